@@ -1,34 +1,93 @@
 """
 Database module for PolymarketLolBot bet tracking.
 Provides thread-safe SQLite operations for storing and retrieving bets.
+
+Each thread keeps its own persistent connection (WAL journal, synchronous
+NORMAL, cached prepared statements). Readers never take the lock and run in
+parallel with the writer; writes are serialized by a single write lock.
 """
 
+import re
 import sqlite3
 import threading
-from typing import List, Dict, Optional
-from datetime import datetime
+import weakref
+import json
+from typing import List, Dict, Optional, Tuple, Iterator
+from datetime import datetime, timezone
 import csv
 
 
+class _ThreadConnection:
+    """
+    A thread's SQLite connection, closed when its owner thread exits.
+
+    Only the thread-local slot holds a strong reference: once the thread
+    ends and its locals are released, the finalizer closes the connection.
+    """
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+        self._finalizer = weakref.finalize(self, conn.close)
+
+    def close(self):
+        self._finalizer()
+
+
 class BetDatabase:
     """Thread-safe SQLite database for bet tracking."""
 
-    def __init__(self, db_path="bets.db"):
+    def __init__(self, db_path="bets.db", cached_statements: int = 256):
         """
         Initialize database connection and create tables if needed.
 
         Args:
             db_path: Path to SQLite database file
+            cached_statements: Prepared statements kept per connection
         """
         self.db_path = db_path
+        self.cached_statements = cached_statements
+        # Write lock only: WAL lets readers proceed while a write is in progress
         self.lock = threading.Lock()
+        self._local = threading.local()
+        # Weak: connections of finished threads are closed, not kept until close()
+        self._connections = weakref.WeakSet()
+        self._connections_lock = threading.Lock()
         self._init_database()
 
+    @property
+    def conn(self) -> sqlite3.Connection:
+        """Persistent connection of the calling thread (opened on first use)."""
+        holder = getattr(self._local, 'holder', None)
+        if holder is None:
+            # Only used by its own thread; check_same_thread=False lets close() reach it
+            conn = sqlite3.connect(
+                self.db_path,
+                timeout=30,
+                cached_statements=self.cached_statements,
+                check_same_thread=False
+            )
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA synchronous = NORMAL")
+            holder = _ThreadConnection(conn)
+            self._local.holder = holder
+            with self._connections_lock:
+                self._connections.add(holder)
+        return holder.conn
+
+    def close(self):
+        """Close every connection still open (threads that exited already closed theirs)."""
+        with self._connections_lock:
+            holders, self._connections = list(self._connections), weakref.WeakSet()
+        for holder in holders:
+            holder.close()
+        self._local = threading.local()
+
     def _init_database(self):
         """Create tables and indexes if they don't exist."""
         with self.lock:
-            conn = sqlite3.connect(self.db_path)
-            conn.row_factory = sqlite3.Row
+            conn = self.conn
+            # WAL is persistent in the database file
+            conn.execute("PRAGMA journal_mode = WAL")
             cursor = conn.cursor()
 
             # Create bets table
@@ -63,9 +122,235 @@ class BetDatabase:
             cursor.execute("""
                 CREATE INDEX IF NOT EXISTS idx_order_id ON bets(order_id)
             """)
+            # Keyset pagination order (placed_at DESC, bet_id DESC)
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_placed_at_bet_id ON bets(placed_at DESC, bet_id DESC)
+            """)
+
+            # Position ledger, folded incrementally from fills
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS positions (
+                    token_id TEXT PRIMARY KEY,
+                    market_id TEXT,
+                    outcome TEXT,
+                    net_size REAL NOT NULL DEFAULT 0,
+                    avg_entry_price REAL NOT NULL DEFAULT 0,
+                    realized_pnl REAL NOT NULL DEFAULT 0,
+                    updated_at INTEGER
+                )
+            """)
+
+            # Trades sync cursor (single row)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS position_sync (
+                    id INTEGER PRIMARY KEY CHECK (id = 1),
+                    after INTEGER NOT NULL DEFAULT 0,
+                    seen TEXT NOT NULL DEFAULT '{}'
+                )
+            """)
+
+            # Stats summary tables, maintained by triggers on bets
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS bet_stats (
+                    id INTEGER PRIMARY KEY CHECK (id = 1),
+                    total_bets INTEGER NOT NULL DEFAULT 0,
+                    active_bets INTEGER NOT NULL DEFAULT 0,
+                    settled_bets INTEGER NOT NULL DEFAULT 0,
+                    wins INTEGER NOT NULL DEFAULT 0,
+                    total_pnl REAL NOT NULL DEFAULT 0
+                )
+            """)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS bet_stats_daily (
+                    day TEXT PRIMARY KEY,
+                    settled_bets INTEGER NOT NULL DEFAULT 0,
+                    wins INTEGER NOT NULL DEFAULT 0,
+                    pnl REAL NOT NULL DEFAULT 0
+                )
+            """)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS bet_stats_market (
+                    market_id TEXT PRIMARY KEY,
+                    market_question TEXT,
+                    total_bets INTEGER NOT NULL DEFAULT 0,
+                    settled_bets INTEGER NOT NULL DEFAULT 0,
+                    wins INTEGER NOT NULL DEFAULT 0,
+                    pnl REAL NOT NULL DEFAULT 0
+                )
+            """)
+            for trigger in self._stats_triggers():
+                cursor.execute(trigger)
+
+            # Full-text index over question/outcome (FTS5 may be missing from old SQLite builds)
+            self.fts_enabled = self._init_fts(cursor)
+
+            # Existing database: build the summaries once from history
+            cursor.execute("SELECT COUNT(*) FROM bet_stats")
+            if cursor.fetchone()[0] == 0:
+                self._rebuild_stats(cursor)
 
             conn.commit()
-            conn.close()
+
+    @staticmethod
+    def _init_fts(cursor) -> bool:
+        """
+        Create the bets_fts external-content FTS5 table and its sync triggers.
+
+        Returns:
+            True if full-text search is available
+        """
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'bets_fts'")
+        exists = cursor.fetchone() is not None
+
+        try:
+            cursor.execute("""
+                CREATE VIRTUAL TABLE IF NOT EXISTS bets_fts USING fts5(
+                    market_question, outcome,
+                    content='bets', content_rowid='bet_id',
+                    tokenize='unicode61 remove_diacritics 2'
+                )
+            """)
+        except sqlite3.OperationalError:
+            return False
+
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS bets_fts_ai AFTER INSERT ON bets BEGIN
+                INSERT INTO bets_fts (rowid, market_question, outcome)
+                VALUES (NEW.bet_id, NEW.market_question, NEW.outcome);
+            END
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS bets_fts_ad AFTER DELETE ON bets BEGIN
+                INSERT INTO bets_fts (bets_fts, rowid, market_question, outcome)
+                VALUES ('delete', OLD.bet_id, OLD.market_question, OLD.outcome);
+            END
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS bets_fts_au AFTER UPDATE OF market_question, outcome ON bets BEGIN
+                INSERT INTO bets_fts (bets_fts, rowid, market_question, outcome)
+                VALUES ('delete', OLD.bet_id, OLD.market_question, OLD.outcome);
+                INSERT INTO bets_fts (rowid, market_question, outcome)
+                VALUES (NEW.bet_id, NEW.market_question, NEW.outcome);
+            END
+        """)
+
+        # Existing history: index it once
+        if not exists:
+            cursor.execute("INSERT INTO bets_fts (bets_fts) VALUES ('rebuild')")
+        return True
+
+    def rebuild_search_index(self):
+        """Rebuild the full-text index from bets."""
+        if not self.fts_enabled:
+            return
+        with self.lock, self.conn as conn:
+            conn.execute("INSERT INTO bets_fts (bets_fts) VALUES ('rebuild')")
+
+    @staticmethod
+    def _fts_query(text: str) -> Optional[str]:
+        """
+        Turn user input into an FTS5 query: every word must match as a prefix.
+
+        Returns:
+            MATCH expression, or None if the text has no searchable word
+        """
+        words = re.findall(r"\w+", text, re.UNICODE)
+        if not words:
+            return None
+        return " ".join(f'"{word}"*' for word in words)
+
+    @classmethod
+    def _stats_delta(cls, row: str, sign: int) -> List[str]:
+        """
+        Statements adding (sign=1) or removing (sign=-1) one bet row
+        (NEW or OLD) from the stats summary tables.
+        """
+        settled = f"COALESCE({row}.status = 'settled', 0)"
+        active = f"COALESCE({row}.status IN ('pending', 'active'), 0)"
+        win = f"COALESCE({row}.status = 'settled' AND {row}.pnl > 0, 0)"
+        pnl = f"(CASE WHEN {settled} THEN COALESCE({row}.pnl, 0) ELSE 0 END)"
+        market_id = f"COALESCE({row}.market_id, '')"
+
+        return [
+            f"""
+            UPDATE bet_stats SET
+                total_bets = total_bets + {sign},
+                active_bets = active_bets + {sign} * {active},
+                settled_bets = settled_bets + {sign} * {settled},
+                wins = wins + {sign} * {win},
+                total_pnl = total_pnl + {sign} * {pnl}
+            WHERE id = 1;
+            """,
+            f"""
+            INSERT INTO bet_stats_daily (day, settled_bets, wins, pnl)
+            SELECT date(COALESCE({row}.settled_at, {row}.placed_at)), {sign}, {sign} * {win}, {sign} * {pnl}
+            WHERE {row}.status = 'settled'
+            ON CONFLICT(day) DO UPDATE SET
+                settled_bets = settled_bets + excluded.settled_bets,
+                wins = wins + excluded.wins,
+                pnl = pnl + excluded.pnl;
+            """,
+            f"""
+            INSERT INTO bet_stats_market (market_id, market_question, total_bets, settled_bets, wins, pnl)
+            VALUES ({market_id}, {row}.market_question, {sign}, {sign} * {settled}, {sign} * {win}, {sign} * {pnl})
+            ON CONFLICT(market_id) DO UPDATE SET
+                market_question = COALESCE(excluded.market_question, market_question),
+                total_bets = total_bets + excluded.total_bets,
+                settled_bets = settled_bets + excluded.settled_bets,
+                wins = wins + excluded.wins,
+                pnl = pnl + excluded.pnl;
+            """
+        ]
+
+    @classmethod
+    def _stats_triggers(cls) -> List[str]:
+        """Triggers keeping the stats summary tables in sync with bets."""
+        insert = "".join(cls._stats_delta("NEW", 1))
+        delete = "".join(cls._stats_delta("OLD", -1))
+        return [
+            f"CREATE TRIGGER IF NOT EXISTS bets_stats_ai AFTER INSERT ON bets BEGIN {insert} END",
+            f"CREATE TRIGGER IF NOT EXISTS bets_stats_ad AFTER DELETE ON bets BEGIN {delete} END",
+            f"CREATE TRIGGER IF NOT EXISTS bets_stats_au AFTER UPDATE ON bets BEGIN {delete} {insert} END",
+        ]
+
+    @staticmethod
+    def _rebuild_stats(cursor):
+        """Recompute the stats summary tables from bets in one pass each."""
+        cursor.execute("DELETE FROM bet_stats")
+        cursor.execute("DELETE FROM bet_stats_daily")
+        cursor.execute("DELETE FROM bet_stats_market")
+
+        cursor.execute("""
+            INSERT INTO bet_stats (id, total_bets, active_bets, settled_bets, wins, total_pnl)
+            SELECT 1,
+                   COUNT(*),
+                   COALESCE(SUM(status IN ('pending', 'active')), 0),
+                   COALESCE(SUM(status = 'settled'), 0),
+                   COALESCE(SUM(status = 'settled' AND pnl > 0), 0),
+                   COALESCE(SUM(CASE WHEN status = 'settled' THEN pnl END), 0)
+            FROM bets
+        """)
+        cursor.execute("""
+            INSERT INTO bet_stats_daily (day, settled_bets, wins, pnl)
+            SELECT date(COALESCE(settled_at, placed_at)), COUNT(*), SUM(pnl > 0), COALESCE(SUM(pnl), 0)
+            FROM bets
+            WHERE status = 'settled'
+            GROUP BY 1
+        """)
+        cursor.execute("""
+            INSERT INTO bet_stats_market (market_id, market_question, total_bets, settled_bets, wins, pnl)
+            SELECT COALESCE(market_id, ''), MAX(market_question), COUNT(*),
+                   SUM(status = 'settled'),
+                   SUM(status = 'settled' AND pnl > 0),
+                   COALESCE(SUM(CASE WHEN status = 'settled' THEN pnl END), 0)
+            FROM bets
+            GROUP BY 1
+        """)
+
+    def rebuild_stats(self):
+        """Recompute the stats summaries from scratch (e.g. after a manual edit with triggers off)."""
+        with self.lock, self.conn as conn:
+            self._rebuild_stats(conn.cursor())
 
     def insert_bet(self, bet_data: Dict) -> int:
         """
@@ -77,8 +362,7 @@ class BetDatabase:
         Returns:
             bet_id of inserted bet
         """
-        with self.lock:
-            conn = sqlite3.connect(self.db_path)
+        with self.lock, self.conn as conn:
             cursor = conn.cursor()
 
             cursor.execute("""
@@ -99,11 +383,152 @@ class BetDatabase:
                 bet_data.get('status', 'pending')
             ))
 
-            bet_id = cursor.lastrowid
-            conn.commit()
-            conn.close()
+            return cursor.lastrowid
+
+    _BULK_COLUMNS = [
+        'order_id', 'token_id', 'market_id', 'market_question', 'outcome', 'side',
+        'price', 'size', 'amount_spent', 'status', 'placed_at',
+        'settled_at', 'settled_price', 'pnl', 'roi'
+    ]
+
+    # Same defaults as insert_bet; placed_at can be given for backfills
+    _BULK_INSERT = """
+        INSERT INTO bets (
+            order_id, token_id, market_id, market_question, outcome, side,
+            price, size, amount_spent, status, placed_at,
+            settled_at, settled_price, pnl, roi
+        ) VALUES (
+            :order_id, :token_id, :market_id, :market_question, :outcome, COALESCE(:side, 'BUY'),
+            :price, :size, :amount_spent, COALESCE(:status, 'pending'), COALESCE(:placed_at, CURRENT_TIMESTAMP),
+            :settled_at, :settled_price, :pnl, :roi
+        )
+    """
 
-            return bet_id
+    # Fields refreshed on an existing order; missing (None) ones keep their value
+    _UPSERT_SET = """
+        token_id = COALESCE(:token_id, token_id),
+        market_id = COALESCE(:market_id, market_id),
+        market_question = COALESCE(:market_question, market_question),
+        outcome = COALESCE(:outcome, outcome),
+        side = COALESCE(:side, side),
+        price = COALESCE(:price, price),
+        size = COALESCE(:size, size),
+        amount_spent = COALESCE(:amount_spent, amount_spent),
+        status = COALESCE(:status, status),
+        settled_at = COALESCE(:settled_at, settled_at),
+        settled_price = COALESCE(:settled_price, settled_price),
+        pnl = COALESCE(:pnl, pnl),
+        roi = COALESCE(:roi, roi)
+    """
+
+    # NOT NULL columns without a default: needed to insert a new order
+    _REQUIRED_COLUMNS = ('token_id', 'outcome', 'price', 'size', 'amount_spent')
+
+    _TIMESTAMP_COLUMNS = ('placed_at', 'settled_at')
+
+    @staticmethod
+    def _to_timestamp(value) -> Optional[str]:
+        """
+        Normalize a timestamp to naive UTC 'YYYY-MM-DD HH:MM:SS'.
+
+        This is the CURRENT_TIMESTAMP format: keyset ordering, the period_days
+        filter, the daily stats triggers and the Arrow export all rely on it.
+
+        Args:
+            value: datetime (naive = UTC), epoch seconds or milliseconds (int,
+                float or digit string), or an ISO 8601 string with or without
+                a zone offset
+
+        Raises:
+            ValueError: If the value is not a recognized timestamp
+        """
+        if value is None:
+            return None
+
+        if isinstance(value, datetime):
+            moment = value
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            seconds = value / 1000 if value > 1e11 else value  # epoch in ms
+            moment = datetime.fromtimestamp(seconds, timezone.utc)
+        elif isinstance(value, str) and re.fullmatch(r'\d+(\.\d+)?', value.strip()):
+            return BetDatabase._to_timestamp(float(value))
+        elif isinstance(value, str):
+            moment = datetime.fromisoformat(value.strip().replace('Z', '+00:00'))
+        else:
+            raise ValueError(f"Unsupported timestamp: {value!r}")
+
+        if moment.tzinfo is not None:
+            moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+        return moment.strftime('%Y-%m-%d %H:%M:%S')
+
+    def _bulk_row(self, bet: Dict) -> Dict:
+        """Named parameters for the bulk statements, timestamps normalized."""
+        row = {column: bet.get(column) for column in self._BULK_COLUMNS}
+        for column in self._TIMESTAMP_COLUMNS:
+            row[column] = self._to_timestamp(row[column])
+        return row
+
+    def insert_bets_bulk(self, bets: List[Dict]) -> int:
+        """
+        Insert many bets in a single transaction.
+
+        Bets whose order_id already exists are skipped, so re-running a
+        backfill is safe.
+
+        Args:
+            bets: Bet dictionaries (same fields as insert_bet, plus optional
+                placed_at, settled_at, settled_price, pnl, roi). Timestamps
+                may be datetimes, epoch values or ISO strings (see _to_timestamp)
+
+        Returns:
+            Number of bets inserted
+        """
+        rows = [self._bulk_row(bet) for bet in bets]
+
+        with self.lock, self.conn as conn:
+            # rowcount sums the rows each statement inserted (skipped ones count 0)
+            cursor = conn.executemany(self._BULK_INSERT + " ON CONFLICT(order_id) DO NOTHING", rows)
+            return cursor.rowcount
+
+    def upsert_by_order_id(self, bets: List[Dict]) -> int:
+        """
+        Insert or update many bets, matched on order_id, in a single transaction.
+
+        Complete bets are inserted, or refresh the stored order. Partial
+        updates (e.g. only order_id, status and pnl) only touch orders that
+        already exist. Fields missing from the input keep their stored value.
+
+        Args:
+            bets: Bet dictionaries with an order_id (same fields as insert_bets_bulk)
+
+        Returns:
+            Number of bets written (inserted or updated)
+        """
+        complete, partial = [], []
+        for bet in bets:
+            if not bet.get('order_id'):
+                continue
+            row = self._bulk_row(bet)
+            if all(row[column] is not None for column in self._REQUIRED_COLUMNS):
+                complete.append(row)
+            else:
+                partial.append(row)
+
+        with self.lock, self.conn as conn:
+            written = 0
+            if complete:
+                cursor = conn.executemany(
+                    self._BULK_INSERT + f" ON CONFLICT(order_id) DO UPDATE SET {self._UPSERT_SET}",
+                    complete
+                )
+                written += cursor.rowcount
+            if partial:
+                cursor = conn.executemany(
+                    f"UPDATE bets SET {self._UPSERT_SET} WHERE order_id = :order_id",
+                    partial
+                )
+                written += cursor.rowcount
+            return written
 
     def update_bet_status(self, bet_id: int, new_status: str, **kwargs):
         """
@@ -114,8 +539,7 @@ class BetDatabase:
             new_status: New status value
             **kwargs: Optional fields to update (settled_at, settled_price, pnl, roi)
         """
-        with self.lock:
-            conn = sqlite3.connect(self.db_path)
+        with self.lock, self.conn as conn:
             cursor = conn.cursor()
 
             # Build dynamic update query
@@ -140,9 +564,6 @@ class BetDatabase:
             query = f"UPDATE bets SET {', '.join(update_fields)} WHERE bet_id = ?"
             cursor.execute(query, values)
 
-            conn.commit()
-            conn.close()
-
     def get_active_bets(self) -> List[Dict]:
         """
         Get all bets with status 'pending' or 'active'.
@@ -150,22 +571,18 @@ class BetDatabase:
         Returns:
             List of bet dictionaries
         """
-        with self.lock:
-            conn = sqlite3.connect(self.db_path)
-            conn.row_factory = sqlite3.Row
-            cursor = conn.cursor()
+        cursor = self.conn.cursor()
 
-            cursor.execute("""
-                SELECT * FROM bets
-                WHERE status IN ('pending', 'active')
-                AND status != 'deleted'
-                ORDER BY placed_at DESC
-            """)
+        cursor.execute("""
+            SELECT * FROM bets
+            WHERE status IN ('pending', 'active')
+            AND status != 'deleted'
+            ORDER BY placed_at DESC
+        """)
 
-            rows = cursor.fetchall()
-            conn.close()
+        rows = cursor.fetchall()
 
-            return [dict(row) for row in rows]
+        return [dict(row) for row in rows]
 
     def get_bet_history(self, filters: Optional[Dict] = None) -> List[Dict]:
         """
@@ -175,42 +592,105 @@ class BetDatabase:
             filters: Dictionary with optional keys:
                 - status: Filter by status ('all', 'pending', 'active', 'settled', 'cancelled')
                 - period_days: Number of days to look back (7, 30, None for all)
-                - search: Text to search in market_question
+                - search: Text to search in market_question and outcome
+                  (each word matched as a prefix)
 
         Returns:
             List of bet dictionaries
+
+        Note:
+            Loads every matching row; prefer get_bet_history_page or
+            iter_bet_history for large histories.
         """
-        with self.lock:
-            conn = sqlite3.connect(self.db_path)
-            conn.row_factory = sqlite3.Row
-            cursor = conn.cursor()
+        return list(self.iter_bet_history(filters))
+
+    def get_bet_history_page(self, filters: Optional[Dict] = None, limit: int = 50,
+                             after: Optional[Tuple[str, int]] = None) -> Dict:
+        """
+        Get one page of bet history, newest first (keyset pagination).
+
+        Args:
+            filters: Optional filters (same as get_bet_history)
+            limit: Page size
+            after: next_cursor of the previous page, None for the first page
 
-            query = "SELECT * FROM bets WHERE status != 'deleted'"
-            params = []
+        Returns:
+            Dictionary with 'bets' (list of bet dictionaries) and
+            'next_cursor' ((placed_at, bet_id) of the last row, None on the last page)
+        """
+        where, params = self._history_filters(filters)
+        if after is not None:
+            where += " AND (placed_at, bet_id) < (?, ?)"
+            params.extend(after)
 
-            if filters:
-                # Status filter
-                if filters.get('status') and filters['status'] != 'all':
-                    query += " AND status = ?"
-                    params.append(filters['status'])
+        cursor = self.conn.cursor()
+        cursor.execute(
+            f"SELECT * FROM bets WHERE {where} ORDER BY placed_at DESC, bet_id DESC LIMIT ?",
+            params + [limit + 1]
+        )
+        rows = [dict(row) for row in cursor.fetchall()]
 
-                # Period filter
-                if filters.get('period_days'):
-                    query += " AND placed_at >= datetime('now', '-' || ? || ' days')"
-                    params.append(filters['period_days'])
+        has_more = len(rows) > limit
+        bets = rows[:limit]
+        next_cursor = (bets[-1]['placed_at'], bets[-1]['bet_id']) if has_more else None
 
-                # Search filter
-                if filters.get('search'):
-                    query += " AND market_question LIKE ?"
-                    params.append(f"%{filters['search']}%")
+        return {'bets': bets, 'next_cursor': next_cursor}
 
-            query += " ORDER BY placed_at DESC"
+    def iter_bet_history(self, filters: Optional[Dict] = None, chunk_size: int = 1000) -> Iterator[Dict]:
+        """
+        Iterate over bet history, newest first, without loading it all.
 
-            cursor.execute(query, params)
-            rows = cursor.fetchall()
-            conn.close()
+        Rows are fetched from one cursor chunk_size at a time, so memory
+        stays constant whatever the history size.
 
-            return [dict(row) for row in rows]
+        Args:
+            filters: Optional filters (same as get_bet_history)
+            chunk_size: Rows fetched per round trip
+
+        Yields:
+            Bet dictionaries
+        """
+        where, params = self._history_filters(filters)
+
+        cursor = self.conn.cursor()
+        cursor.execute(f"SELECT * FROM bets WHERE {where} ORDER BY placed_at DESC, bet_id DESC", params)
+        try:
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    return
+                for row in rows:
+                    yield dict(row)
+        finally:
+            cursor.close()
+
+    def _history_filters(self, filters: Optional[Dict]) -> Tuple[str, List]:
+        """Build the WHERE clause and parameters for history filters."""
+        where = "status != 'deleted'"
+        params = []
+
+        if filters:
+            # Status filter
+            if filters.get('status') and filters['status'] != 'all':
+                where += " AND status = ?"
+                params.append(filters['status'])
+
+            # Period filter
+            if filters.get('period_days'):
+                where += " AND placed_at >= datetime('now', '-' || ? || ' days')"
+                params.append(filters['period_days'])
+
+            # Search filter: word-prefix match on the FTS index, LIKE without it
+            if filters.get('search'):
+                match = self._fts_query(filters['search']) if self.fts_enabled else None
+                if match:
+                    where += " AND bet_id IN (SELECT rowid FROM bets_fts WHERE bets_fts MATCH ?)"
+                    params.append(match)
+                else:
+                    where += " AND market_question LIKE ?"
+                    params.append(f"%{filters['search']}%")
+
+        return where, params
 
     def get_bet_by_id(self, bet_id: int) -> Optional[Dict]:
         """
@@ -222,16 +702,12 @@ class BetDatabase:
         Returns:
             Bet dictionary or None if not found
         """
-        with self.lock:
-            conn = sqlite3.connect(self.db_path)
-            conn.row_factory = sqlite3.Row
-            cursor = conn.cursor()
+        cursor = self.conn.cursor()
 
-            cursor.execute("SELECT * FROM bets WHERE bet_id = ?", (bet_id,))
-            row = cursor.fetchone()
-            conn.close()
+        cursor.execute("SELECT * FROM bets WHERE bet_id = ?", (bet_id,))
+        row = cursor.fetchone()
 
-            return dict(row) if row else None
+        return dict(row) if row else None
 
     def get_bet_by_order_id(self, order_id: str) -> Optional[Dict]:
         """
@@ -243,16 +719,12 @@ class BetDatabase:
         Returns:
             Bet dictionary or None if not found
         """
-        with self.lock:
-            conn = sqlite3.connect(self.db_path)
-            conn.row_factory = sqlite3.Row
-            cursor = conn.cursor()
+        cursor = self.conn.cursor()
 
-            cursor.execute("SELECT * FROM bets WHERE order_id = ?", (order_id,))
-            row = cursor.fetchone()
-            conn.close()
+        cursor.execute("SELECT * FROM bets WHERE order_id = ?", (order_id,))
+        row = cursor.fetchone()
 
-            return dict(row) if row else None
+        return dict(row) if row else None
 
     def export_to_csv(self, filename: str, filters: Optional[Dict] = None):
         """
@@ -262,9 +734,11 @@ class BetDatabase:
             filename: Path to CSV file to create
             filters: Optional filters (same as get_bet_history)
         """
-        bets = self.get_bet_history(filters)
+        bets = self.iter_bet_history(filters)
 
-        if not bets:
+        # Nothing to export: don't create the file
+        first = next(bets, None)
+        if first is None:
             return
 
         with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
@@ -273,53 +747,317 @@ class BetDatabase:
                 'price', 'amount_spent', 'status', 'placed_at', 'settled_at',
                 'pnl', 'roi'
             ]
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+            # Rows stream from the cursor to disk; extra columns are ignored
+            writer = csv.DictWriter(csvfile, fieldnames=fieldnames, extrasaction='ignore')
 
             writer.writeheader()
-            for bet in bets:
-                # Only write relevant fields
-                row = {k: bet.get(k) for k in fieldnames}
-                writer.writerow(row)
+            writer.writerow(first)
+            writer.writerows(bets)
+
+    # Columns exported to Parquet / Arrow, with their Arrow types
+    ARROW_COLUMNS = [
+        ('bet_id', 'int64'),
+        ('order_id', 'string'),
+        ('token_id', 'string'),
+        ('market_id', 'string'),
+        ('market_question', 'string'),
+        ('outcome', 'string'),
+        ('side', 'string'),
+        ('price', 'float64'),
+        ('size', 'float64'),
+        ('amount_spent', 'float64'),
+        ('status', 'string'),
+        ('placed_at', 'timestamp'),
+        ('settled_at', 'timestamp'),
+        ('settled_price', 'float64'),
+        ('pnl', 'float64'),
+        ('roi', 'float64'),
+    ]
+
+    def export_to_parquet(self, filename: str, filters: Optional[Dict] = None,
+                          batch_size: int = 50000, compression: str = 'zstd') -> int:
+        """
+        Export bets to a Parquet file (typed columns, compressed).
+
+        Rows are converted and written batch_size at a time, so memory stays
+        bounded. Requires pyarrow (pip install pyarrow).
+
+        Args:
+            filename: Path to Parquet file to create
+            filters: Optional filters (same as get_bet_history)
+            batch_size: Rows per record batch / row group
+            compression: Parquet codec ('zstd', 'snappy', 'gzip', 'none')
+
+        Returns:
+            Number of bets exported
+        """
+        schema = self._arrow_schema()
+        count = 0
+        with self._pyarrow().parquet.ParquetWriter(filename, schema, compression=compression) as writer:
+            for batch in self._arrow_batches(schema, filters, batch_size):
+                writer.write_batch(batch)
+                count += batch.num_rows
+        return count
+
+    def export_to_arrow(self, filename: str, filters: Optional[Dict] = None,
+                        batch_size: int = 50000, compression: Optional[str] = 'zstd') -> int:
+        """
+        Export bets to an Arrow IPC (Feather v2) file, memory-mappable on load.
+
+        Args:
+            filename: Path to Arrow file to create
+            filters: Optional filters (same as get_bet_history)
+            batch_size: Rows per record batch
+            compression: IPC buffer codec ('zstd', 'lz4' or None)
+
+        Returns:
+            Number of bets exported
+        """
+        pa_ipc = self._pyarrow().ipc
+        schema = self._arrow_schema()
+        options = pa_ipc.IpcWriteOptions(compression=compression)
+        count = 0
+        with pa_ipc.new_file(filename, schema, options=options) as writer:
+            for batch in self._arrow_batches(schema, filters, batch_size):
+                writer.write_batch(batch)
+                count += batch.num_rows
+        return count
+
+    @staticmethod
+    def _pyarrow():
+        """Import pyarrow on first use: it is an optional dependency."""
+        try:
+            import pyarrow
+            import pyarrow.compute  # noqa: F401  (submodules used as pyarrow.*)
+            import pyarrow.ipc  # noqa: F401
+            import pyarrow.parquet  # noqa: F401
+        except ImportError:
+            raise RuntimeError("pyarrow is required for Parquet/Arrow export (pip install pyarrow)")
+        return pyarrow
+
+    def _arrow_schema(self):
+        pa = self._pyarrow()
+        types = {
+            'int64': pa.int64(),
+            'float64': pa.float64(),
+            'string': pa.string(),
+            'timestamp': pa.timestamp('us'),
+        }
+        return pa.schema([(name, types[kind]) for name, kind in self.ARROW_COLUMNS])
+
+    def _arrow_batches(self, schema, filters: Optional[Dict], batch_size: int):
+        """Yield typed RecordBatches straight from the history cursor."""
+        pa = self._pyarrow()
+        pc = pa.compute
+        where, params = self._history_filters(filters)
+        columns = ", ".join(name for name, _ in self.ARROW_COLUMNS)
+
+        cursor = self.conn.cursor()
+        cursor.row_factory = None  # plain tuples: no per-row dict
+        cursor.execute(
+            f"SELECT {columns} FROM bets WHERE {where} ORDER BY placed_at DESC, bet_id DESC",
+            params
+        )
+        try:
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    return
+
+                arrays = []
+                for index, field in enumerate(schema):
+                    values = [row[index] for row in rows]
+                    if pa.types.is_timestamp(field.type):
+                        # Stored as text ('YYYY-MM-DD HH:MM:SS' or ISO 8601)
+                        arrays.append(pc.cast(pa.array(values, pa.string()), field.type))
+                    else:
+                        arrays.append(pa.array(values, field.type))
+                yield pa.RecordBatch.from_arrays(arrays, schema=schema)
+        finally:
+            cursor.close()
 
     def get_stats(self) -> Dict:
         """
         Get overall statistics.
 
+        Read from the bet_stats summary row maintained by triggers, so the
+        cost does not depend on history size.
+
         Returns:
             Dictionary with stats (total_bets, active_bets, settled_bets, total_pnl, win_rate)
         """
-        with self.lock:
-            conn = sqlite3.connect(self.db_path)
-            conn.row_factory = sqlite3.Row
+        cursor = self.conn.cursor()
+
+        cursor.execute("SELECT * FROM bet_stats WHERE id = 1")
+        row = cursor.fetchone()
+
+        settled_bets = row['settled_bets'] if row else 0
+        wins = row['wins'] if row else 0
+        win_rate = (wins / settled_bets * 100) if settled_bets > 0 else 0.0
+
+        return {
+            'total_bets': row['total_bets'] if row else 0,
+            'active_bets': row['active_bets'] if row else 0,
+            'settled_bets': settled_bets,
+            'total_pnl': row['total_pnl'] if row else 0.0,
+            'win_rate': win_rate
+        }
+
+    def get_daily_pnl(self, period_days: Optional[int] = None) -> List[Dict]:
+        """
+        Get realized P&L per day (by settlement date).
+
+        Args:
+            period_days: Number of days to look back (None for all)
+
+        Returns:
+            List of dicts (day, settled_bets, wins, pnl, win_rate), newest first
+        """
+        cursor = self.conn.cursor()
+
+        query = "SELECT * FROM bet_stats_daily WHERE settled_bets != 0"
+        params = []
+        if period_days:
+            query += " AND day >= date('now', '-' || ? || ' days')"
+            params.append(period_days)
+
+        cursor.execute(query + " ORDER BY day DESC", params)
+        return [self._with_win_rate(dict(row)) for row in cursor.fetchall()]
+
+    def get_market_stats(self, limit: Optional[int] = None) -> List[Dict]:
+        """
+        Get bet count, win rate and P&L per market.
+
+        Args:
+            limit: Maximum number of markets (most bets first)
+
+        Returns:
+            List of dicts (market_id, market_question, total_bets,
+            settled_bets, wins, pnl, win_rate)
+        """
+        cursor = self.conn.cursor()
+
+        query = "SELECT * FROM bet_stats_market WHERE total_bets != 0 ORDER BY total_bets DESC, pnl DESC"
+        params = []
+        if limit:
+            query += " LIMIT ?"
+            params.append(limit)
+
+        cursor.execute(query, params)
+        return [self._with_win_rate(dict(row)) for row in cursor.fetchall()]
+
+    @staticmethod
+    def _with_win_rate(row: Dict) -> Dict:
+        settled = row['settled_bets']
+        row['win_rate'] = (row['wins'] / settled * 100) if settled > 0 else 0.0
+        return row
+
+    # Position ledger (store interface used by positions.PositionTracker)
+
+    _UPSERT_POSITION = """
+        INSERT INTO positions (
+            token_id, market_id, outcome, net_size, avg_entry_price, realized_pnl, updated_at
+        ) VALUES (
+            :token_id, :market_id, :outcome, :net_size, :avg_entry_price, :realized_pnl, :updated_at
+        )
+        ON CONFLICT(token_id) DO UPDATE SET
+            market_id = excluded.market_id,
+            outcome = excluded.outcome,
+            net_size = excluded.net_size,
+            avg_entry_price = excluded.avg_entry_price,
+            realized_pnl = excluded.realized_pnl,
+            updated_at = excluded.updated_at
+    """
+
+    def get_cursor(self) -> Dict:
+        """
+        Get the trades sync cursor.
+
+        Returns:
+            Dictionary with 'after' (last match_time) and 'seen' (trade_id -> match_time)
+        """
+        cursor = self.conn.cursor()
+
+        cursor.execute("SELECT after, seen FROM position_sync WHERE id = 1")
+        row = cursor.fetchone()
+
+        if not row:
+            return {'after': 0, 'seen': {}}
+        return {'after': row[0], 'seen': json.loads(row[1])}
+
+    def set_cursor(self, cursor_data: Dict):
+        """
+        Store the trades sync cursor without applying fills.
+
+        Args:
+            cursor_data: Dictionary with 'after' and 'seen'
+        """
+        with self.lock, self.conn as conn:
+            self._save_cursor(conn.cursor(), cursor_data)
+
+    def apply_fills(self, fills: List[Dict], cursor_data: Dict):
+        """
+        Fold fills into the position ledger and advance the cursor atomically.
+
+        The affected rows are read, folded with positions.apply_fill (the same
+        average cost code as the JSON store) and written back, all in one
+        transaction.
+
+        Args:
+            fills: Fill dictionaries (token_id, market_id, outcome, side, size, price, match_time)
+            cursor_data: Cursor to store with the fills (see get_cursor)
+        """
+        # Imported here: the ledger logic lives next to the bot, not in archive/
+        from positions import apply_fill, new_entry
+
+        token_ids = list(dict.fromkeys(fill['token_id'] for fill in fills))
+
+        # One transaction: committed on success, rolled back on error
+        with self.lock, self.conn as conn:
             cursor = conn.cursor()
 
-            # Total bets
-            cursor.execute("SELECT COUNT(*) as count FROM bets")
-            total_bets = cursor.fetchone()['count']
+            entries = {}
+            for start in range(0, len(token_ids), 500):
+                chunk = token_ids[start:start + 500]
+                cursor.execute(
+                    f"SELECT * FROM positions WHERE token_id IN ({', '.join('?' * len(chunk))})",
+                    chunk
+                )
+                entries.update((row['token_id'], dict(row)) for row in cursor.fetchall())
+
+            # Fills for the same token must be folded in match order
+            for fill in fills:
+                entry = entries.get(fill['token_id']) or new_entry(fill)
+                entries[fill['token_id']] = apply_fill(entry, fill)
 
-            # Active bets
-            cursor.execute("SELECT COUNT(*) as count FROM bets WHERE status IN ('pending', 'active')")
-            active_bets = cursor.fetchone()['count']
+            cursor.executemany(self._UPSERT_POSITION, list(entries.values()))
+            self._save_cursor(cursor, cursor_data)
 
-            # Settled bets
-            cursor.execute("SELECT COUNT(*) as count FROM bets WHERE status = 'settled'")
-            settled_bets = cursor.fetchone()['count']
+    def get_positions(self, open_only: bool = False) -> List[Dict]:
+        """
+        Get position ledger rows.
+
+        Args:
+            open_only: Only return positions with a non-zero size
+
+        Returns:
+            List of position dictionaries (token_id, market_id, outcome,
+            net_size, avg_entry_price, realized_pnl, updated_at)
+        """
+        cursor = self.conn.cursor()
 
-            # Total P&L
-            cursor.execute("SELECT SUM(pnl) as total FROM bets WHERE status = 'settled'")
-            total_pnl = cursor.fetchone()['total'] or 0.0
+        query = "SELECT * FROM positions"
+        if open_only:
+            query += " WHERE abs(net_size) >= 0.01"
+        cursor.execute(query + " ORDER BY updated_at DESC")
 
-            # Win rate (bets with positive P&L / total settled)
-            cursor.execute("SELECT COUNT(*) as count FROM bets WHERE status = 'settled' AND pnl > 0")
-            wins = cursor.fetchone()['count']
-            win_rate = (wins / settled_bets * 100) if settled_bets > 0 else 0.0
+        rows = cursor.fetchall()
 
-            conn.close()
+        return [dict(row) for row in rows]
 
-            return {
-                'total_bets': total_bets,
-                'active_bets': active_bets,
-                'settled_bets': settled_bets,
-                'total_pnl': total_pnl,
-                'win_rate': win_rate
-            }
+    @staticmethod
+    def _save_cursor(cursor, cursor_data: Dict):
+        cursor.execute("""
+            INSERT INTO position_sync (id, after, seen) VALUES (1, ?, ?)
+            ON CONFLICT(id) DO UPDATE SET after = excluded.after, seen = excluded.seen
+        """, (cursor_data.get('after') or 0, json.dumps(cursor_data.get('seen') or {})))
@@ -0,0 +1,279 @@
+"""
+Variante asyncio de PolymarketLolBot.
+
+Les lectures HTTP (recherche, prix, positions) passent par un httpx.AsyncClient
+partagé avec pool de connexions, ce qui permet de lancer des centaines de
+requêtes de prix concurrentes sur une seule boucle d'événements.
+"""
+
+import time
+import asyncio
+from typing import List, Dict, Optional
+
+import metrics
+from bot import PolymarketLolBot, MarketSearchIndex
+from transport import create_async_client
+from logger import get_logger
+
+log = get_logger("async_bot")
+
+
+class AsyncPolymarketLolBot:
+    """
+    Bot Polymarket asynchrone.
+
+    Partage l'authentification, le catalogue de marchés et le flux WebSocket
+    d'un PolymarketLolBot: les deux variantes peuvent tourner côte à côte sans
+    dupliquer l'état. La signature d'ordres (CPU + SDK synchrone) tourne dans
+    un thread via asyncio.to_thread.
+    """
+
+    CLOB_URL = "https://clob.polymarket.com"
+    GAMMA_URL = "https://gamma-api.polymarket.com"
+
+    def __init__(self, bot: Optional[PolymarketLolBot] = None, max_connections: int = 100):
+        """
+        Args:
+            bot: Bot synchrone à partager (créé si absent)
+            max_connections: Taille du pool de connexions httpx
+        """
+        self.bot = bot or PolymarketLolBot()
+
+        self.http = create_async_client(max_connections=max_connections)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.aclose()
+
+    async def aclose(self):
+        """Ferme le pool de connexions."""
+        await self.http.aclose()
+
+    async def search_lol_markets(self, query: str = "Jesus", include_closed: bool = False) -> List[Dict]:
+        """Version async de PolymarketLolBot.search_lol_markets."""
+        try:
+            if include_closed:
+                # Les marchés fermés ne sont pas dans le cache
+                response = await self.http.get(
+                    f"{self.GAMMA_URL}/markets",
+                    params={"limit": 200, "closed": "true"}
+                )
+                results = MarketSearchIndex(response.json()).search(query)
+            else:
+                if self.bot.catalog.age is None:
+                    await asyncio.to_thread(self.bot.catalog.get_markets)
+                results = self.bot.catalog.search(query)
+
+            # Copie: les appelants normalisent les marchés en place
+            return [dict(market) for market in results]
+
+        except Exception as e:
+            log.exception("❌ Erreur recherche: %s", e)
+            return []
+
+    async def get_token_price(self, token_id: str) -> Optional[float]:
+        """
+        Version async de PolymarketLolBot.get_token_price.
+
+        Même cascade (flux WebSocket, /prices, dernier trade, carnet d'ordres,
+        puis cache Gamma), mêmes circuit breakers, même ordre adaptatif, même
+        hedging (PRICE_LOOKUP_MODE / PRICE_HEDGE_DELAY) et mêmes histogrammes
+        price.* que la version synchrone: l'état est celui du bot partagé.
+        """
+        if not token_id:
+            return None
+
+        started = time.perf_counter()
+        price = await self._lookup_price(token_id)
+        metrics.observe("price.lookup", time.perf_counter() - started, error=price is None)
+        return price
+
+    async def _lookup_price(self, token_id: str) -> Optional[float]:
+        price = self.bot.stream.get_price(token_id)
+        if price:
+            return price
+
+        if self.bot.price_lookup_mode == 'hedged':
+            price = await self._race_price_sources(token_id)
+        else:
+            price = await self._sequential_price_sources(token_id)
+        if price:
+            return price
+
+        # Method 4: Gamma market catalog
+        started = time.perf_counter()
+        try:
+            if self.bot.catalog.age is None:
+                await asyncio.to_thread(self.bot.catalog.get_markets)
+            price = self.bot.catalog.get_outcome_price(token_id)
+        except Exception as e:
+            metrics.observe("price.gamma", time.perf_counter() - started, error=True)
+            log.warning("⚠️  Method 4 (Gamma API) failed: %s", e)
+            price = None
+        else:
+            metrics.observe("price.gamma", time.perf_counter() - started, error=not price)
+        if price:
+            return price
+
+        log.warning("❌ All 4 methods failed for token %.20s...", token_id)
+        return None
+
+    async def _sequential_price_sources(self, token_id: str) -> Optional[float]:
+        """Sources réseau une par une, dans l'ordre adaptatif du bot."""
+        for name in self.bot._ordered_price_sources():
+            price = await self._try_price_source(name, token_id)
+            if price:
+                return price
+        return None
+
+    async def _race_price_sources(self, token_id: str) -> Optional[float]:
+        """
+        Sources réseau lancées en décalé; le premier prix valide gagne.
+
+        Les requêtes perdantes ne sont pas annulées: elles finissent en tâche
+        de fond et enregistrent leur résultat dans le circuit breaker.
+        """
+        pending = set()
+        for name in self.bot._ordered_price_sources():
+            if not self.bot.price_source_health[name].allow():
+                continue
+            pending.add(asyncio.ensure_future(self._try_price_source(name, token_id, allowed=True)))
+
+            price = await self._first_valid_price(pending, timeout=self.bot.price_hedge_delay)
+            if price:
+                return price
+
+        return await self._first_valid_price(pending, timeout=None)
+
+    @staticmethod
+    async def _first_valid_price(pending: set, timeout: Optional[float]) -> Optional[float]:
+        """Premier prix valide parmi les tâches en cours (retirées de `pending` une fois finies)."""
+        loop = asyncio.get_running_loop()
+        deadline = None if timeout is None else loop.time() + timeout
+
+        while pending:
+            remaining = None if deadline is None else deadline - loop.time()
+            if remaining is not None and remaining <= 0:
+                break
+
+            done, _ = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                break
+            for task in done:
+                pending.discard(task)
+                price = task.result()
+                if price:
+                    return price
+
+        return None
+
+    async def _try_price_source(self, name: str, token_id: str, allowed: bool = False) -> Optional[float]:
+        """Appelle une source réseau via son circuit breaker; les erreurs donnent None."""
+        if not allowed and not self.bot.price_source_health[name].allow():
+            return None
+
+        label = next(s[2] for s in PolymarketLolBot.PRICE_SOURCES if s[0] == name)
+        fetch = {
+            'prices': self._price_from_prices_endpoint,
+            'last_trade': self._price_from_last_trade,
+            'order_book': self._price_from_order_book,
+        }[name]
+
+        started = time.perf_counter()
+        try:
+            price = await fetch(token_id)
+        except Exception as e:
+            self.bot.record_price_source(name, time.perf_counter() - started, None, error=True)
+            log.warning("⚠️  %s failed: %s", label, e)
+            return None
+
+        self.bot.record_price_source(name, time.perf_counter() - started, price)
+        return price
+
+    async def _price_from_prices_endpoint(self, token_id: str) -> Optional[float]:
+        """Method 1: /prices."""
+        response = await self.http.get(f"{self.CLOB_URL}/prices", params={"token_id": token_id})
+        return PolymarketLolBot._parse_prices_response(response, token_id)
+
+    async def _price_from_last_trade(self, token_id: str) -> Optional[float]:
+        """Method 2: /last-trade-price."""
+        response = await self.http.get(f"{self.CLOB_URL}/last-trade-price", params={"token_id": token_id})
+        response.raise_for_status()
+        return PolymarketLolBot._parse_last_trade(response.json())
+
+    async def _price_from_order_book(self, token_id: str) -> Optional[float]:
+        """Method 3: /book (même règle de mid que la version synchrone)."""
+        response = await self.http.get(f"{self.CLOB_URL}/book", params={"token_id": token_id})
+        response.raise_for_status()
+        return PolymarketLolBot._parse_order_book(response.json())
+
+    async def get_token_prices(self, token_ids: List[str]) -> Dict[str, Optional[float]]:
+        """Version async de PolymarketLolBot.get_token_prices (un POST /prices)."""
+        token_ids = [t for t in dict.fromkeys(token_ids) if t]
+        prices = {token_id: self.bot.stream.get_price(token_id) for token_id in token_ids}
+        missing = [token_id for token_id, price in prices.items() if price is None]
+        if not missing:
+            return prices
+
+        try:
+            body = [
+                {"token_id": token_id, "side": side}
+                for token_id in missing
+                for side in ("BUY", "SELL")
+            ]
+            response = await self.http.post(f"{self.CLOB_URL}/prices", json=body)
+            if response.status_code == 200:
+                data = response.json()
+                if isinstance(data, dict):
+                    for token_id in missing:
+                        prices[token_id] = PolymarketLolBot._parse_prices_entry(data.get(token_id))
+        except Exception as e:
+            log.warning("⚠️  Bulk prices endpoint failed: %s", e)
+
+        # Fallback individuel, en parallèle
+        missing = [token_id for token_id, price in prices.items() if price is None]
+        results = await asyncio.gather(*(self.get_token_price(token_id) for token_id in missing))
+        prices.update(zip(missing, results))
+        return prices
+
+    async def get_user_positions(self, market_id: Optional[str] = None) -> List[Dict]:
+        """Version async de PolymarketLolBot.get_user_positions (prix en un seul lot)."""
+        try:
+            await asyncio.to_thread(self.bot.position_tracker.sync)
+            positions = self.bot.position_tracker.open_positions(market_id)
+            prices = await self.get_token_prices([pos['token_id'] for pos in positions])
+
+            return [
+                PolymarketLolBot._value_position(pos, prices.get(pos['token_id']))
+                for pos in positions
+            ]
+
+        except Exception as e:
+            log.warning("⚠️  Error fetching positions: %s", e)
+            return []
+
+    async def place_bet(
+        self,
+        token_id: str,
+        side: str,
+        price: float,
+        size: float = None,
+        total_amount: float = None
+    ) -> Optional[Dict]:
+        """
+        Version async de PolymarketLolBot.place_bet (sans confirmation).
+
+        La signature EIP-712 et le POST passent par le SDK synchrone dans un
+        thread, pour ne pas bloquer la boucle d'événements.
+        """
+        return await asyncio.to_thread(
+            self.bot.place_bet,
+            token_id=token_id,
+            side=side,
+            price=price,
+            size=size,
+            total_amount=total_amount,
+            confirm=False
+        )
@@ -1,58 +1,1054 @@
 import os
+import re
 import sys
+import json
 import time
-from typing import List, Dict, Optional
-import requests
+import logging
+import threading
+from typing import List, Dict, Optional, Tuple
 from dotenv import load_dotenv
 from py_clob_client.client import ClobClient
 from py_clob_client.constants import POLYGON
 from py_clob_client.clob_types import OrderArgs
 import dataclasses
+from bisect import bisect_left
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from urllib.parse import urlparse
+
+import metrics
+from logger import get_logger, setup_logging
+from positions import PositionTracker
+from transport import HttpTransport, get_proxies, get_transport, install_clob_http_client
+
+try:
+    import websocket  # websocket-client, optionnel: streaming des prix
+except ImportError:
+    websocket = None
 
 # Fix Windows encoding for emojis
 if sys.platform == "win32":
     sys.stdout.reconfigure(encoding='utf-8')
 
 load_dotenv()
+log = get_logger("bot")
+
+
+class MarketSearchIndex:
+    """
+    Index inversé mot -> marchés sur question, description et tags.
+
+    Chaque mot-clé de la requête est traité comme un préfixe: "wor" trouve
+    "worlds". Les recherches sont des unions/intersections d'ensembles au lieu
+    d'un scan de tous les marchés.
+    """
+
+    WORD_RE = re.compile(r"\w+")
+
+    def __init__(self, markets: List[Dict]):
+        self.markets = markets
+        postings: Dict[str, set] = {}
+
+        for pos, market in enumerate(markets):
+            for word in self._tokenize(self._searchable_text(market)):
+                postings.setdefault(word, set()).add(pos)
+
+        self._postings = postings
+        self._vocabulary = sorted(postings)
+
+    def search(self, query: str, match_all: bool = False) -> List[Dict]:
+        """
+        Recherche les marchés correspondant à la requête.
+
+        Args:
+            query: Mots-clés séparés par des espaces
+            match_all: True = tous les mots-clés (AND), False = au moins un (ANY)
+
+        Returns:
+            Marchés trouvés, dans l'ordre de l'index
+        """
+        keywords = query.lower().split()
+        if not keywords:
+            return []
+
+        result = None
+        for keyword in keywords:
+            matches = self._match_keyword(keyword)
+            if result is None:
+                result = matches
+            elif match_all:
+                result = result & matches
+            else:
+                result = result | matches
+
+            if match_all and not result:
+                return []
+
+        return [self.markets[pos] for pos in sorted(result)]
+
+    def _match_keyword(self, keyword: str) -> set:
+        """Positions des marchés dont un mot commence par chaque partie du mot-clé."""
+        result = None
+        for part in self._tokenize(keyword):
+            matches = self._match_prefix(part)
+            result = matches if result is None else result & matches
+        return result or set()
+
+    def _match_prefix(self, prefix: str) -> set:
+        """Union des postings de tous les mots commençant par `prefix`."""
+        matches = set()
+        vocabulary = self._vocabulary
+        # Parcours par index: pas de copie de la fin du vocabulaire
+        for i in range(bisect_left(vocabulary, prefix), len(vocabulary)):
+            word = vocabulary[i]
+            if not word.startswith(prefix):
+                break
+            matches |= self._postings[word]
+        return matches
+
+    @classmethod
+    def _tokenize(cls, text: str) -> List[str]:
+        return cls.WORD_RE.findall(text.lower())
+
+    @staticmethod
+    def _searchable_text(market: Dict) -> str:
+        tags = []
+        for tag in market.get("tags") or []:
+            if isinstance(tag, dict):
+                tag = tag.get("label") or tag.get("slug") or ""
+            tags.append(str(tag))
+        return " ".join([
+            market.get("question") or "",
+            market.get("description") or "",
+            " ".join(tags)
+        ])
+
+
+class MarketCatalog:
+    """
+    Cache en mémoire de la liste des marchés Gamma.
+
+    La liste est téléchargée une fois puis rafraîchie en arrière-plan toutes
+    les `ttl` secondes. Recherche, fallback de prix et GUI lisent tous la même
+    copie au lieu de re-télécharger la liste à chaque action.
+    """
+
+    GAMMA_MARKETS_URL = "https://gamma-api.polymarket.com/markets"
+    PAGE_SIZE = 500
+
+    def __init__(self, session: HttpTransport, ttl: Optional[float] = None,
+                 max_markets: Optional[int] = None):
+        """
+        Args:
+            session: Session HTTP utilisée pour les appels Gamma
+            ttl: Durée de vie du cache en secondes (défaut: MARKET_CATALOG_TTL ou 60)
+            max_markets: Nombre max de marchés chargés (défaut: MARKET_CATALOG_SIZE ou 1000)
+
+        Après un échec de chargement, aucun nouveau téléchargement n'est tenté
+        pendant MARKET_CATALOG_RETRY secondes (défaut 30): les lectures
+        retournent le snapshot précédent (ou vide) au lieu de re-télécharger.
+        """
+        self.session = session
+        self.ttl = ttl if ttl is not None else float(os.getenv("MARKET_CATALOG_TTL", "60"))
+        self.max_markets = max_markets or int(os.getenv("MARKET_CATALOG_SIZE", "1000"))
+        self.retry_backoff = float(os.getenv("MARKET_CATALOG_RETRY", "30"))
+
+        self._markets: List[Dict] = []
+        # token_id -> (marché, index de l'outcome)
+        self._token_index: Dict[str, Tuple[Dict, int]] = {}
+        # clé marché -> (valeur brute des token ids, token ids parsés)
+        self._parsed_token_ids: Dict[str, Tuple[str, List[str]]] = {}
+        self._search_index = MarketSearchIndex([])
+        self._fetched_at = 0.0
+        self._failed_at = 0.0
+        self._refresh_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    @property
+    def age(self) -> Optional[float]:
+        """Âge du cache en secondes (None si jamais chargé)."""
+        if not self._fetched_at:
+            return None
+        return time.time() - self._fetched_at
+
+    def get_markets(self) -> List[Dict]:
+        """
+        Retourne les marchés actifs en cache.
+
+        Le premier appel charge la liste de façon synchrone et démarre le
+        rafraîchissement en arrière-plan. Les dicts retournés sont partagés:
+        les copier avant de les modifier.
+        """
+        if not self._fetched_at:
+            self.refresh()
+        self.start()
+        return self._markets
+
+    def _backing_off(self) -> bool:
+        """True si le dernier chargement a échoué il y a moins de retry_backoff secondes."""
+        return bool(self._failed_at) and time.time() - self._failed_at < self.retry_backoff
+
+    def refresh(self) -> bool:
+        """
+        Re-télécharge la liste des marchés actifs.
+
+        Returns:
+            True si le cache a été mis à jour
+        """
+        with self._refresh_lock:
+            # Un autre thread vient peut-être de rafraîchir pendant qu'on attendait
+            if self._fetched_at and time.time() - self._fetched_at < 1.0:
+                return True
+            # Échec récent (Gamma en panne): garder le snapshot actuel
+            if self._backing_off():
+                return False
+
+            try:
+                markets = []
+                offset = 0
+                while len(markets) < self.max_markets:
+                    limit = min(self.PAGE_SIZE, self.max_markets - len(markets))
+                    params = {"limit": limit, "offset": offset, "closed": "false"}
+                    response = self.session.get(self.GAMMA_MARKETS_URL, params=params, timeout=15)
+                    response.raise_for_status()
+                    page = response.json()
+                    markets.extend(page)
+                    if len(page) < limit:
+                        break
+                    offset += len(page)
+
+                self._build_token_index(markets)
+                self._search_index = MarketSearchIndex(markets)
+                self._markets = markets
+                self._fetched_at = time.time()
+                self._failed_at = 0.0
+                return True
+
+            except Exception as e:
+                self._failed_at = time.time()
+                log.warning("⚠️  Market catalog refresh failed (retry in %.0fs): %s", self.retry_backoff, e)
+                return False
+
+    def search(self, query: str, match_all: bool = False) -> List[Dict]:
+        """Recherche par mots-clés dans le cache (voir MarketSearchIndex.search)."""
+        if not self._fetched_at:
+            self.get_markets()
+        return self._search_index.search(query, match_all=match_all)
+
+    def find_token(self, token_id: str) -> Optional[Tuple[Dict, int]]:
+        """
+        Retrouve le marché contenant un token.
+
+        Returns:
+            (marché, index de l'outcome) ou None si absent du cache
+        """
+        if not self._fetched_at:
+            self.get_markets()
+        return self._token_index.get(token_id)
+
+    def get_outcome_price(self, token_id: str) -> Optional[float]:
+        """Prix Gamma (outcomePrices) d'un token, via l'index."""
+        found = self.find_token(token_id)
+        if found is None:
+            return None
+        return self.outcome_price(*found)
+
+    @staticmethod
+    def outcome_price(market: Dict, i: int) -> Optional[float]:
+        """Prix Gamma de l'outcome `i` d'un marché (résultat de find_token)."""
+        outcome_prices = market.get('outcomePrices')
+        if isinstance(outcome_prices, str):
+            outcome_prices = json.loads(outcome_prices)
+
+        if outcome_prices and i < len(outcome_prices):
+            price = float(outcome_prices[i])
+            if price > 0:
+                return price
+        return None
+
+    def _build_token_index(self, markets: List[Dict]):
+        """
+        Reconstruit l'index token_id -> (marché, outcome).
+
+        Les token ids déjà parsés au refresh précédent sont réutilisés tant que
+        la valeur brute du marché n'a pas changé: seul le JSON des marchés
+        nouveaux ou modifiés est re-parsé.
+        """
+        token_index = {}
+        parsed_token_ids = {}
+
+        for market in markets:
+            key = str(market.get('id') or market.get('conditionId') or market.get('condition_id'))
+            raw = market.get('clobTokenIds') or market.get('tokens') or []
+
+            previous = self._parsed_token_ids.get(key)
+            if previous is not None and previous[0] == raw:
+                token_ids = previous[1]
+            else:
+                token_ids = self._parse_token_ids(raw)
+            parsed_token_ids[key] = (raw, token_ids)
+
+            for i, token_id in enumerate(token_ids):
+                if token_id:
+                    token_index[token_id] = (market, i)
+
+        self._parsed_token_ids = parsed_token_ids
+        self._token_index = token_index
+
+    @staticmethod
+    def _parse_token_ids(raw) -> List[str]:
+        """Normalise clobTokenIds (string JSON ou liste) ou l'ancien format tokens."""
+        try:
+            if isinstance(raw, str):
+                raw = json.loads(raw)
+        except ValueError:
+            return []
+
+        token_ids = []
+        for token in raw or []:
+            if isinstance(token, dict):
+                token_ids.append(token.get('token_id'))
+            else:
+                token_ids.append(token)
+        return token_ids
+
+    def start(self):
+        """Démarre le thread de rafraîchissement (idempotent)."""
+        if self._thread is not None or self.ttl <= 0:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._refresh_loop, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Arrête le thread de rafraîchissement."""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _refresh_loop(self):
+        """Boucle de rafraîchissement en arrière-plan."""
+        while not self._stop_event.wait(self.ttl):
+            self.refresh()
+
+
+class PriceStream:
+    """
+    Flux de prix temps réel via le WebSocket "market" du CLOB Polymarket.
+
+    Garde un carnet d'ordres en mémoire par token abonné et en déduit le
+    meilleur bid/ask. Lecture synchrone via get_quote/get_price, ou push via
+    des callbacks enregistrés avec add_listener(callback(token_id, quote)).
+    """
+
+    WS_URL = "wss://ws-subscriptions-clob.polymarket.com/ws/market"
+    PING_INTERVAL = 10
+    MAX_RECONNECT_DELAY = 30
+
+    def __init__(self, url: Optional[str] = None, proxies: Optional[Dict] = None):
+        """
+        Args:
+            url: URL du WebSocket (défaut: WS_URL, utile pour un serveur de test local)
+            proxies: Proxies HTTP au format requests ({'https': 'http://host:port'})
+        """
+        self.url = url or self.WS_URL
+        self.proxies = proxies
+
+        self._token_ids = set()
+        self._books: Dict[str, Dict] = {}
+        self._quotes: Dict[str, Dict] = {}
+        self._listeners = []
+        self._lock = threading.Lock()
+        self._ws = None
+        self._connected = threading.Event()
+        self._stop_event = threading.Event()
+        self._updated = threading.Condition(self._lock)
+        self._thread = None
+
+    @property
+    def available(self) -> bool:
+        """False si websocket-client n'est pas installé."""
+        return websocket is not None
+
+    @property
+    def connected(self) -> bool:
+        return self._connected.is_set()
+
+    def subscribe(self, token_ids: List[str]):
+        """Ajoute des tokens au flux et démarre la connexion si besoin."""
+        token_ids = [t for t in token_ids if t]
+        with self._lock:
+            new_ids = [t for t in token_ids if t not in self._token_ids]
+            self._token_ids.update(new_ids)
+
+        if new_ids and self.connected:
+            self._send({"assets_ids": new_ids, "operation": "subscribe"})
+        self.start()
+
+    def unsubscribe(self, token_ids: List[str]):
+        """Retire des tokens du flux."""
+        with self._lock:
+            old_ids = [t for t in token_ids if t in self._token_ids]
+            for token_id in old_ids:
+                self._token_ids.discard(token_id)
+                self._books.pop(token_id, None)
+                self._quotes.pop(token_id, None)
+
+        if old_ids and self.connected:
+            self._send({"assets_ids": old_ids, "operation": "unsubscribe"})
+
+    def add_listener(self, callback):
+        """Enregistre callback(token_id, quote), appelé à chaque mise à jour."""
+        with self._lock:
+            if callback not in self._listeners:
+                self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        with self._lock:
+            if callback in self._listeners:
+                self._listeners.remove(callback)
+
+    def get_quote(self, token_id: str) -> Optional[Dict]:
+        """
+        Dernier top-of-book connu d'un token.
+
+        Returns:
+            Dict avec best_bid, best_ask, price, last_trade, updated_at
+            ou None si pas de donnée depuis la dernière (re)connexion
+        """
+        if not self.connected:
+            return None
+        with self._lock:
+            quote = self._quotes.get(token_id)
+            return dict(quote) if quote else None
+
+    def get_price(self, token_id: str) -> Optional[float]:
+        """Prix courant d'un token depuis le flux (None si indisponible)."""
+        quote = self.get_quote(token_id)
+        return quote['price'] if quote else None
+
+    def wait_for_price(self, token_id: str, timeout: float = 5.0) -> Optional[float]:
+        """Attend le premier prix d'un token (ex: juste après subscribe)."""
+        deadline = time.time() + timeout
+        with self._updated:
+            while token_id not in self._quotes:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    return None
+                self._updated.wait(remaining)
+        return self.get_price(token_id)
+
+    def start(self):
+        """Démarre le thread de connexion (idempotent)."""
+        if self._thread is not None:
+            return
+        if websocket is None:
+            log.warning("⚠️  websocket-client not installed - price streaming disabled")
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Ferme la connexion et arrête le thread."""
+        self._stop_event.set()
+        if self._ws:
+            self._ws.close()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _run(self):
+        """Boucle de connexion avec reconnexion exponentielle."""
+        delay = 1
+        while not self._stop_event.is_set():
+            started = time.time()
+            self._ws = websocket.WebSocketApp(
+                self.url,
+                on_open=self._on_open,
+                on_message=self._on_message,
+                on_close=self._on_close,
+                on_error=lambda ws, error: log.warning("⚠️  Price stream error: %s", error)
+            )
+            self._ws.run_forever(**self._proxy_options())
+            self._connected.clear()
+
+            if self._stop_event.is_set():
+                break
+            # Connexion restée ouverte un moment: on repart du délai minimal
+            if time.time() - started > self.MAX_RECONNECT_DELAY:
+                delay = 1
+            self._stop_event.wait(delay)
+            delay = min(delay * 2, self.MAX_RECONNECT_DELAY)
+
+    def _proxy_options(self) -> Dict:
+        proxy = (self.proxies or {}).get('https') or (self.proxies or {}).get('http')
+        if not proxy:
+            return {}
+        parsed = urlparse(proxy)
+        return {
+            'http_proxy_host': parsed.hostname,
+            'http_proxy_port': parsed.port,
+            'proxy_type': 'http'
+        }
+
+    def _send(self, payload: Dict):
+        try:
+            self._ws.send(json.dumps(payload))
+        except Exception as e:
+            log.warning("⚠️  Price stream send failed: %s", e)
+
+    def _on_open(self, ws):
+        with self._lock:
+            # Le serveur renvoie un snapshot "book" complet à l'abonnement
+            self._books.clear()
+            self._quotes.clear()
+            token_ids = list(self._token_ids)
+        self._connected.set()
+        self._send({"assets_ids": token_ids, "type": "market"})
+        threading.Thread(target=self._ping_loop, args=(ws,), daemon=True).start()
+
+    def _on_close(self, ws, status_code=None, message=None):
+        self._connected.clear()
+
+    def _ping_loop(self, ws):
+        """Keep-alive applicatif attendu par le serveur."""
+        while self._ws is ws and self.connected and not self._stop_event.wait(self.PING_INTERVAL):
+            try:
+                ws.send("PING")
+            except Exception:
+                break
+
+    def _on_message(self, ws, message: str):
+        try:
+            data = json.loads(message)
+        except ValueError:
+            return  # "PONG" et autres messages texte
+
+        events = data if isinstance(data, list) else [data]
+        updated = []
+        with self._lock:
+            for event in events:
+                if isinstance(event, dict):
+                    updated.extend(self._apply_event(event))
+            quotes = [(token_id, dict(self._quotes[token_id])) for token_id in dict.fromkeys(updated)
+                      if token_id in self._quotes]
+            listeners = list(self._listeners)
+            if quotes:
+                self._updated.notify_all()
+
+        for token_id, quote in quotes:
+            for callback in listeners:
+                try:
+                    callback(token_id, quote)
+                except Exception as e:
+                    log.exception("⚠️  Price stream listener failed: %s", e)
+
+    def _apply_event(self, event: Dict) -> List[str]:
+        """Applique un événement au carnet en mémoire. Retourne les tokens modifiés."""
+        event_type = event.get('event_type')
+
+        if event_type == 'book':
+            token_id = event.get('asset_id')
+            if token_id not in self._token_ids:
+                return []
+            self._books[token_id] = {
+                'bids': {float(level['price']): float(level['size']) for level in event.get('bids', [])},
+                'asks': {float(level['price']): float(level['size']) for level in event.get('asks', [])}
+            }
+            self._update_quote(token_id)
+            return [token_id]
+
+        if event_type == 'price_change':
+            # Nouveau format: price_changes[] avec asset_id; ancien: changes[] + asset_id global
+            changes = event.get('price_changes') or [
+                dict(change, asset_id=event.get('asset_id')) for change in event.get('changes', [])
+            ]
+            updated = []
+            for change in changes:
+                token_id = change.get('asset_id')
+                book = self._books.get(token_id)
+                if book is None:
+                    continue
+                levels = book['bids'] if change.get('side', '').upper() == 'BUY' else book['asks']
+                price, size = float(change['price']), float(change['size'])
+                if size > 0:
+                    levels[price] = size
+                else:
+                    levels.pop(price, None)
+                self._update_quote(token_id)
+                updated.append(token_id)
+            return updated
+
+        if event_type == 'last_trade_price':
+            token_id = event.get('asset_id')
+            if token_id not in self._quotes:
+                return []
+            self._quotes[token_id]['last_trade'] = float(event['price'])
+            self._quotes[token_id]['updated_at'] = time.time()
+            return [token_id]
+
+        return []
+
+    def _update_quote(self, token_id: str):
+        """Recalcule le top-of-book (même règle que le fallback order book)."""
+        book = self._books[token_id]
+        best_bid = max(book['bids']) if book['bids'] else None
+        best_ask = min(book['asks']) if book['asks'] else None
+
+        if best_bid and best_ask:
+            price = (best_bid + best_ask) / 2
+        else:
+            price = best_bid or best_ask
+
+        previous = self._quotes.get(token_id, {})
+        self._quotes[token_id] = {
+            'best_bid': best_bid,
+            'best_ask': best_ask,
+            'price': price,
+            'last_trade': previous.get('last_trade'),
+            'updated_at': time.time()
+        }
+
+
+def apply_price_buffers(price: float, amount: float, price_buffer_pct: float) -> Tuple[float, float]:
+    """
+    Applique les buffers d'un ordre rapide (GUI et web).
+
+    Le montant prend +1% fixe (reste au-dessus du minimum de $1), le prix
+    prend +price_buffer_pct%, plafonné à 0.99.
+
+    Returns:
+        (prix ajusté, montant ajusté)
+    """
+    safe_amount = amount * 1.01
+    remaining_to_max = 0.99 - price
+    price_buffer = min(price * (price_buffer_pct / 100), remaining_to_max)
+    adjusted_price = min(0.99, price + price_buffer)
+    return adjusted_price, safe_amount
+
+
+class OrderPresigner:
+    """
+    Cache d'ordres BUY pré-signés pour les tokens du marché sélectionné.
+
+    Pour chaque (token, montant, buffer) un ordre signé est gardé prêt au prix
+    courant. Un thread le re-signe quand le prix bouge de plus de
+    `threshold_pct`. Au clic, take() rend l'ordre et il ne reste qu'à le POSTer.
+    """
+
+    DEFAULT_AMOUNTS = [1, 5, 10, 25, 50, 100]
+
+    def __init__(self, bot, enabled: Optional[bool] = None, threshold_pct: Optional[float] = None,
+                 interval: Optional[float] = None):
+        """
+        Args:
+            bot: PolymarketLolBot (signature et prix)
+            enabled: Active le pré-signage (défaut: PRESIGN_ORDERS)
+            threshold_pct: Écart de prix (%) qui déclenche une re-signature (défaut: PRESIGN_REPRICE_PCT ou 0.5)
+            interval: Période de vérification des prix en secondes (défaut: PRESIGN_INTERVAL ou 1)
+        """
+        self.bot = bot
+        if enabled is None:
+            enabled = os.getenv("PRESIGN_ORDERS", "false").lower() in ("1", "true", "yes")
+        self.enabled = enabled
+        self.threshold_pct = threshold_pct if threshold_pct is not None else float(os.getenv("PRESIGN_REPRICE_PCT", "0.5"))
+        self.interval = interval if interval is not None else float(os.getenv("PRESIGN_INTERVAL", "1"))
+
+        self._targets: List[Tuple[str, float, float]] = []  # (token_id, montant, buffer %)
+        self._orders: Dict[Tuple[str, float, float], Dict] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def watch(self, token_ids: List[str], amounts: Optional[List[float]] = None,
+              price_buffer_pct: float = 0.5):
+        """
+        Remplace les ordres à garder prêts.
+
+        Args:
+            token_ids: Tokens du marché sélectionné
+            amounts: Montants saisis par l'utilisateur (défaut: boutons rapides)
+            price_buffer_pct: Buffer de prix (%) appliqué comme pour un achat normal
+        """
+        if not self.enabled:
+            return
+
+        amounts = amounts or self.DEFAULT_AMOUNTS
+        targets = [
+            (token_id, self._key_amount(amount), float(price_buffer_pct))
+            for token_id in token_ids if token_id
+            for amount in dict.fromkeys(amounts) if amount and amount >= 1.0
+        ]
+
+        with self._lock:
+            self._targets = targets
+            self._orders = {key: order for key, order in self._orders.items() if key in targets}
+
+        self._start()
+        self._wake.set()
+
+    def clear(self):
+        """Oublie tous les ordres pré-signés."""
+        with self._lock:
+            self._targets = []
+            self._orders = {}
+
+    def take(self, token_id: str, amount: float, price_buffer_pct: float, price: float) -> Optional[Dict]:
+        """
+        Retire l'ordre pré-signé correspondant, s'il est encore au bon prix.
+
+        Un ordre signé ne peut être posté qu'une fois: il est retiré du cache
+        et le thread en signe un nouveau.
+
+        Returns:
+            Dict avec order, price, total_amount, ref_price ou None
+        """
+        key = (token_id, self._key_amount(amount), float(price_buffer_pct))
+        with self._lock:
+            entry = self._orders.pop(key, None)
+        self._wake.set()
+
+        if entry is None or not self._is_fresh(entry, price):
+            return None
+        return entry
+
+    def _is_fresh(self, entry: Dict, price: Optional[float]) -> bool:
+        if not price:
+            return False
+        return abs(price - entry['ref_price']) / entry['ref_price'] * 100 <= self.threshold_pct
+
+    def _start(self):
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._resign_loop, daemon=True)
+        self._thread.start()
+
+    def _resign_loop(self):
+        """Re-signe les ordres manquants ou dont le prix de référence a trop bougé."""
+        while True:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+            with self._lock:
+                targets = list(self._targets)
+            if not targets:
+                continue
+
+            try:
+                prices = self.bot.get_token_prices(list(dict.fromkeys(t[0] for t in targets)))
+            except Exception as e:
+                log.warning("⚠️  Presign price refresh failed: %s", e)
+                continue
+
+            for key in targets:
+                token_id, amount, price_buffer_pct = key
+                price = prices.get(token_id)
+                if not price:
+                    continue
+
+                with self._lock:
+                    entry = self._orders.get(key)
+                if entry is not None and self._is_fresh(entry, price):
+                    continue
+
+                try:
+                    entry = self._sign(token_id, amount, price_buffer_pct, price)
+                except Exception as e:
+                    log.warning("⚠️  Presign failed for token %.20s...: %s", token_id, e)
+                    continue
+
+                with self._lock:
+                    if key in self._targets:
+                        self._orders[key] = entry
+
+    def _sign(self, token_id: str, amount: float, price_buffer_pct: float, price: float) -> Dict:
+        """Signe un ordre BUY identique à celui que place_bet enverrait."""
+        adjusted_price, total_amount = apply_price_buffers(price, amount, price_buffer_pct)
+        size = max(total_amount, 1.0) / adjusted_price
+        args = OrderArgs(price=adjusted_price, size=size, token_id=token_id, side="BUY")
+
+        return {
+            'order': self.bot.client.create_order(args),
+            'price': adjusted_price,
+            'total_amount': adjusted_price * size,
+            'ref_price': price,
+            'signed_at': time.time()
+        }
+
+    @staticmethod
+    def _key_amount(amount: float) -> float:
+        return round(float(amount), 2)
+
+
+class ConnectionWarmer:
+    """
+    Garde chaudes les connexions vers la CLOB et Gamma.
+
+    Le premier POST d'ordre après une période d'inactivité paie DNS, TCP, TLS
+    (et le CONNECT du proxy). Le warmer ouvre les connexions au démarrage,
+    les rafraîchit périodiquement avant que le serveur ne les ferme, et peut
+    être relancé à la sélection d'un marché pour que le POST parte sur une
+    connexion déjà ouverte.
+    """
+
+    CLOB_URL = "https://clob.polymarket.com"
+    GAMMA_URL = "https://gamma-api.polymarket.com/markets?limit=1"
+
+    def __init__(self, bot, enabled: Optional[bool] = None, interval: Optional[float] = None,
+                 min_gap: float = 2.0):
+        """
+        Args:
+            bot: PolymarketLolBot (client SDK et transport)
+            enabled: Active le warm-up (défaut: CONNECTION_WARMUP ou true)
+            interval: Période du keep-alive en secondes (défaut: WARMUP_INTERVAL ou 20)
+            min_gap: Délai minimum entre deux warm-ups déclenchés par ping()
+        """
+        self.bot = bot
+        if enabled is None:
+            enabled = os.getenv("CONNECTION_WARMUP", "true").lower() in ("1", "true", "yes")
+        self.enabled = enabled
+        self.interval = interval if interval is not None else float(os.getenv("WARMUP_INTERVAL", "20"))
+        self.min_gap = min_gap
+
+        # Cible -> appel qui réutilise le pool à réchauffer
+        self.targets = {
+            'clob_sdk': lambda: self.bot.client.get_ok(),  # pool httpx du SDK (post_order)
+            'clob': lambda: self.bot.session.get(self.CLOB_URL, timeout=5),
+            'gamma': lambda: self.bot.session.get(self.GAMMA_URL, timeout=5),
+        }
+
+        # Pool dédié: les pings ne passent pas derrière les requêtes de prix
+        self._executor = ThreadPoolExecutor(max_workers=len(self.targets), thread_name_prefix="warmup")
+        self._timings: Dict[str, Dict] = {}
+        self._last_warm = 0.0
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def warm(self) -> Dict[str, Optional[float]]:
+        """
+        Ping toutes les cibles en parallèle.
+
+        Returns:
+            Dict cible -> latence en ms (None si l'appel a échoué)
+        """
+        self._last_warm = time.time()
+        futures = {
+            name: self._executor.submit(self._timed, name, call)
+            for name, call in self.targets.items()
+        }
+        return {name: future.result() for name, future in futures.items()}
+
+    def ping(self):
+        """Demande un warm-up (non bloquant), par ex. à la sélection d'un marché."""
+        if not self.enabled:
+            return
+        self._start()
+        if time.time() - self._last_warm >= self.min_gap:
+            self._wake.set()
+
+    def start(self):
+        """Warm-up initial puis keep-alive périodique, en arrière-plan."""
+        if not self.enabled:
+            return
+        self._start()
+        self._wake.set()
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """Dernières mesures par cible (latence, succès, compteurs)."""
+        with self._lock:
+            return {name: dict(stats) for name, stats in self._timings.items()}
+
+    def _timed(self, name: str, call) -> Optional[float]:
+        start = time.perf_counter()
+        try:
+            call()
+            ok = True
+        except Exception:
+            ok = False
+        elapsed = time.perf_counter() - start
+        latency_ms = round(elapsed * 1000, 1)
+        metrics.observe(f"warmup.{name}", elapsed, error=not ok)
+
+        with self._lock:
+            stats = self._timings.setdefault(name, {'count': 0, 'errors': 0})
+            stats['count'] += 1
+            stats['errors'] += 0 if ok else 1
+            stats['ok'] = ok
+            stats['last_ms'] = latency_ms
+            stats['last_at'] = time.time()
+            # Le premier appel inclut l'ouverture de connexion
+            stats.setdefault('cold_ms', latency_ms)
+
+        return latency_ms if ok else None
+
+    def _start(self):
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._keepalive_loop, daemon=True)
+        self._thread.start()
+
+    def _keepalive_loop(self):
+        while True:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            try:
+                self.warm()
+            except Exception as e:
+                log.warning("⚠️  Connection warm-up failed: %s", e)
+
+
+class SourceHealth:
+    """
+    Santé d'une source de prix: circuit breaker et statistiques récentes.
+
+    Après `failure_threshold` erreurs consécutives le circuit s'ouvre et la
+    source est sautée pendant `cooldown` secondes. Ensuite une seule requête
+    de test passe (half-open): succès -> circuit refermé, échec -> rouvert.
+    Taux de succès et latence sont des moyennes mobiles exponentielles qui
+    servent à ordonner la cascade.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 3, cooldown: float = 30.0,
+                 alpha: float = 0.2):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.alpha = alpha
+
+        self.state = 'closed'
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.success_rate = 1.0
+        self.latency: Optional[float] = None
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """True si la source peut être appelée maintenant."""
+        with self._lock:
+            if self.state == 'closed':
+                return True
+            if self.state == 'open' and time.time() - self.opened_at >= self.cooldown:
+                self.state = 'half_open'
+                self._probe_in_flight = False
+            if self.state == 'half_open' and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            return False
+
+    def record(self, latency: float, ok: bool, error: bool = False):
+        """
+        Enregistre un appel.
+
+        Args:
+            latency: Durée de l'appel en secondes
+            ok: Un prix valide a été obtenu
+            error: L'appel a échoué: exception ou HTTP 5xx (compte pour le
+                circuit breaker). Une réponse sans prix est ok=False, error=False
+        """
+        with self._lock:
+            self.success_rate += self.alpha * ((1.0 if ok else 0.0) - self.success_rate)
+            self.latency = latency if self.latency is None else self.latency + self.alpha * (latency - self.latency)
+
+            if error:
+                self.consecutive_failures += 1
+                if self.state == 'half_open' or self.consecutive_failures >= self.failure_threshold:
+                    self.state = 'open'
+                    self.opened_at = time.time()
+            else:
+                self.consecutive_failures = 0
+                self.state = 'closed'
+            self._probe_in_flight = False
+
+    def score(self) -> float:
+        """Coût attendu d'un appel (plus petit = essayé en premier)."""
+        return (self.latency or 0.0) / max(self.success_rate, 0.05)
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                'source': self.name,
+                'state': self.state,
+                'consecutive_failures': self.consecutive_failures,
+                'success_rate': round(self.success_rate, 3),
+                'latency_ms': round(self.latency * 1000, 1) if self.latency is not None else None
+            }
 
 
 class PolymarketLolBot:
     """Bot pour parier rapidement sur des games LoL via Polymarket."""
 
+    # Network price sources, in cascade order (name, method, label)
+    PRICE_SOURCES = [
+        ('prices', '_price_from_prices_endpoint', 'Method 1 (prices endpoint)'),
+        ('last_trade', '_price_from_last_trade', 'Method 2 (last trade)'),
+        ('order_book', '_price_from_order_book', 'Method 3 (order book)'),
+    ]
+
     def __init__(self):
         """Initialize le bot avec les credentials depuis .env"""
         self.pk = os.getenv("PRIVATE_KEY").strip().replace('"', '')
         self.funder = os.getenv("FUNDER_ADDRESS")
 
         # Setup proxy if configured
-        proxy_http = os.getenv("PROXY_HTTP", "").strip()
-        proxy_https = os.getenv("PROXY_HTTPS", "").strip()
-
-        self.proxies = None
-        if proxy_http or proxy_https:
-            self.proxies = {}
-            if proxy_http:
-                self.proxies['http'] = proxy_http
-            if proxy_https:
-                self.proxies['https'] = proxy_https
-
-            # Set system environment variables so py-clob-client uses proxy too
+        self.proxies = get_proxies()
+        if self.proxies:
+            proxy_http = self.proxies.get('http', '')
+            proxy_https = self.proxies.get('https', '')
+
+            # Set system environment variables for libraries outside the transport
             os.environ['HTTP_PROXY'] = proxy_http
             os.environ['HTTPS_PROXY'] = proxy_https
             os.environ['http_proxy'] = proxy_http  # lowercase for compatibility
             os.environ['https_proxy'] = proxy_https
 
-            print(f"🌐 Proxy configured: {proxy_https or proxy_http}")
-            print(f"   → System proxy env vars set for py-clob-client")
+            log.info("🌐 Proxy configured: %s", proxy_https or proxy_http)
         else:
-            print("🌐 No proxy - direct connection")
+            log.info("🌐 No proxy - direct connection")
 
-        # Create requests session with proxy
-        self.session = requests.Session()
-        if self.proxies:
-            self.session.proxies.update(self.proxies)
+        # Shared HTTP transport (one keep-alive pool, retries, proxy)
+        self.session = get_transport()
+
+        # py-clob-client builds its httpx client at import time: rebuild it
+        # with the same proxy / pool settings
+        install_clob_http_client()
+
+        # Cache partagé des marchés Gamma
+        self.catalog = MarketCatalog(self.session)
+
+        # Flux de prix WebSocket (démarré au premier abonnement)
+        self.stream = PriceStream(proxies=self.proxies)
+
+        # Cascade de prix: "hedged" (sources lancées en décalé) ou "sequential"
+        self.price_lookup_mode = os.getenv("PRICE_LOOKUP_MODE", "hedged").strip().lower()
+        self.price_hedge_delay = float(os.getenv("PRICE_HEDGE_DELAY", "0.3"))
+        self._price_executor = ThreadPoolExecutor(
+            max_workers=int(os.getenv("PRICE_LOOKUP_WORKERS", "16")),
+            thread_name_prefix="price-source"
+        )
+        # Pool séparé pour les fallbacks par lot: un lot lent ne bloque pas
+        # les lookups unitaires (hedged, /api/price, flux SSE)
+        self._batch_executor = ThreadPoolExecutor(
+            max_workers=int(os.getenv("PRICE_BATCH_WORKERS", "8")),
+            thread_name_prefix="price-batch"
+        )
+        # Latence max du fallback par token dans get_token_prices
+        self.price_batch_deadline = float(os.getenv("PRICE_BATCH_DEADLINE", "5"))
+
+        # Circuit breaker + stats par source réseau
+        self.price_source_health = {
+            name: SourceHealth(
+                name,
+                failure_threshold=int(os.getenv("PRICE_BREAKER_FAILURES", "3")),
+                cooldown=float(os.getenv("PRICE_BREAKER_COOLDOWN", "30"))
+            )
+            for name, _, _ in self.PRICE_SOURCES
+        }
 
-        print("🚀 Initialisation du bot LoL Polymarket...")
+        log.info("🚀 Initialisation du bot LoL Polymarket...")
         self.client = ClobClient(
             host="https://clob.polymarket.com",
             key=self.pk,
@@ -63,9 +1059,31 @@ class PolymarketLolBot:
 
         # Authentification
         self.client.set_api_creds(self.client.create_or_derive_api_creds())
-        print("✅ Bot connecté et authentifié\n")
+        log.info("✅ Bot connecté et authentifié")
+
+        # Ordres pré-signés pour l'achat rapide (PRESIGN_ORDERS)
+        self.presigner = OrderPresigner(self)
+
+        # Positions suivies depuis les trades, curseur persisté (POSITIONS_STATE_FILE)
+        self.position_tracker = PositionTracker(
+            self.client,
+            store=self._position_store(),
+            owners=[self.client.creds.api_key, self.funder]
+        )
+
+        # Connexions CLOB/Gamma gardées ouvertes (CONNECTION_WARMUP)
+        self.warmer = ConnectionWarmer(self)
+        self.warmer.start()
 
 
+    @staticmethod
+    def _position_store():
+        """Ledger store: JSON state file (défaut) ou table SQLite de BetDatabase (POSITIONS_STORE=sqlite)."""
+        if os.getenv("POSITIONS_STORE", "json").lower() == "sqlite":
+            from archive.database import BetDatabase
+            return BetDatabase(os.getenv("BETS_DB_PATH", "bets.db"))
+        return None
+
     def search_lol_markets(self, query: str = "Jesus", include_closed: bool = False) -> List[Dict]:
         """
         Recherche les marchés LoL disponibles.
@@ -77,43 +1095,29 @@ class PolymarketLolBot:
         Returns:
             Liste des marchés trouvés
         """
-        print(f"🔍 Recherche de marchés: '{query}'...")
+        log.info("🔍 Recherche de marchés: '%s'...", query)
+        started = time.perf_counter()
 
         try:
-            # API Gamma (meilleures données)
-            url = "https://gamma-api.polymarket.com/markets"
-            params = {
-                "limit": 200,
-                "closed": "true" if include_closed else "false"
-            }
-
-            response = self.session.get(url, params=params, timeout=10)
-            markets = response.json()
-
-            # Filtrer les marchés LoL/esports
-            keywords = query.lower().split()
-            lol_markets = []
-
-            for market in markets:
-                question = market.get("question", "").lower()
-                description = market.get("description", "").lower()
-                tags = [t.lower() for t in market.get("tags", [])]
+            if include_closed:
+                # Les marchés fermés ne sont pas dans le cache
+                url = "https://gamma-api.polymarket.com/markets"
+                params = {"limit": 200, "closed": "true"}
+                response = self.session.get(url, params=params, timeout=10)
+                results = MarketSearchIndex(response.json()).search(query)
+            else:
+                results = self.catalog.search(query)
 
-                # Chercher dans question, description, ou tags
-                for keyword in keywords:
-                    if (keyword in question or
-                        keyword in description or
-                        any(keyword in tag for tag in tags)):
-                        lol_markets.append(market)
-                        break
+            # Copie: les appelants normalisent les marchés en place
+            lol_markets = [dict(market) for market in results]
+            metrics.observe("search_lol_markets", time.perf_counter() - started)
 
-            print(f"📊 {len(lol_markets)} marchés trouvés\n")
+            log.info("📊 %d marchés trouvés", len(lol_markets))
             return lol_markets
 
         except Exception as e:
-            print(f"❌ Erreur recherche: {e}")
-            import traceback
-            traceback.print_exc()
+            metrics.observe("search_lol_markets", time.perf_counter() - started, error=True)
+            log.exception("❌ Erreur recherche: %s", e)
             return []
 
     def display_market(self, market: Dict):
@@ -146,145 +1150,394 @@ class PolymarketLolBot:
 
     def get_token_price(self, token_id: str) -> Optional[float]:
         """Récupère le prix actuel d'un token."""
+        price, _ = self.get_token_price_with_source(token_id)
+        return price
+
+    def get_token_price_with_source(self, token_id: str) -> Tuple[Optional[float], Optional[str]]:
+        """
+        Récupère le prix d'un token et la source qui l'a fourni.
+
+        En mode "hedged" (PRICE_LOOKUP_MODE, défaut) les sources réseau sont
+        lancées en décalé: si la source courante n'a pas répondu après
+        PRICE_HEDGE_DELAY secondes, la suivante part en parallèle et le premier
+        prix valide gagne. En mode "sequential" elles sont essayées une par une.
+
+        Returns:
+            (prix, source) avec source parmi stream, prices, last_trade,
+            order_book, gamma; (None, None) si toutes échouent
+        """
         if not token_id:
-            print("❌ No token_id provided")
-            return None
+            log.error("❌ No token_id provided")
+            return None, None
+
+        started = time.perf_counter()
+        price, source = self._lookup_price(token_id)
+        metrics.observe("price.lookup", time.perf_counter() - started, error=price is None)
+        return price, source
+
+    def _lookup_price(self, token_id: str) -> Tuple[Optional[float], Optional[str]]:
+        """Cascade de get_token_price_with_source (non chronométrée)."""
+        # Method 0: Live price from the WebSocket stream (no HTTP)
+        price = self.stream.get_price(token_id)
+        if price:
+            return price, 'stream'
+
+        # Methods 1-3: network sources
+        if self.price_lookup_mode == 'hedged':
+            price, source = self._race_price_sources(token_id)
+        else:
+            price, source = self._sequential_price_sources(token_id)
+        if price:
+            return price, source
 
-        # Method 1: Try simplified prices endpoint
-        try:
-            # The correct format is /prices?token_id=XXX (singular, not plural)
-            url = f"https://clob.polymarket.com/prices?token_id={token_id}"
-            response = self.session.get(url, timeout=10)
+        # Method 4: Gamma market catalog (in memory, may lag by the catalog TTL)
+        price = self._try_price_source('gamma', token_id)
+        if price:
+            return price, 'gamma'
 
-            if response.status_code == 200:
-                data = response.json()
-                if isinstance(data, dict) and token_id in data:
-                    price = float(data[token_id])
-                    if price > 0:
-                        return price
-        except Exception as e:
-            print(f"⚠️  Method 1 (prices endpoint) failed: {e}")
+        log.warning("❌ All 4 methods failed for token %.20s...", token_id)
+        return None, None
 
-        # Method 2: Try using py-clob-client's built-in method
-        try:
-            if hasattr(self.client, 'get_last_trade_price'):
-                result = self.client.get_last_trade_price(token_id)
-                if result:
-                    # Can be a dict, float, or string
-                    if isinstance(result, dict):
-                        # Try common dict keys
-                        price = result.get('price') or result.get('last_price') or result.get('last')
-                        if price:
-                            price = float(price)
-                            if price > 0:
-                                print(f"✓ Got price from last trade: ${price:.4f}")
-                                return price
-                    else:
-                        price = float(result)
-                        if price > 0:
-                            print(f"✓ Got price from last trade: ${price:.4f}")
-                            return price
-        except Exception as e:
-            print(f"⚠️  Method 2 (last trade) failed: {e}")
+    def get_price_source_health(self) -> List[Dict]:
+        """État des sources réseau, dans l'ordre où elles sont essayées."""
+        return [self.price_source_health[name].snapshot() for name in self._ordered_price_sources()]
+
+    def _ordered_price_sources(self) -> List[str]:
+        """
+        Ordre adaptatif de la cascade: sources au circuit fermé d'abord, puis
+        par coût attendu (latence / taux de succès). À égalité l'ordre
+        d'origine est conservé.
+        """
+        names = [name for name, _, _ in self.PRICE_SOURCES]
+        return sorted(names, key=lambda name: (
+            self.price_source_health[name].state != 'closed',
+            self.price_source_health[name].score(),
+            names.index(name)
+        ))
+
+    def _sequential_price_sources(self, token_id: str, until: Optional[float] = None) -> Tuple[Optional[float], Optional[str]]:
+        """Essaie les sources réseau une par une (aucune nouvelle source après `until`, en time.time())."""
+        for name in self._ordered_price_sources():
+            if until is not None and time.time() >= until:
+                break
+            price = self._try_price_source(name, token_id)
+            if price:
+                return price, name
+        return None, None
+
+    def _race_price_sources(self, token_id: str) -> Tuple[Optional[float], Optional[str]]:
+        """Lance les sources réseau en décalé et retourne le premier prix valide."""
+        pending = {}
+
+        for name in self._ordered_price_sources():
+            # Circuit ouvert: source sautée, sans attendre de délai de hedge
+            if not self.price_source_health[name].allow():
+                continue
+
+            future = self._price_executor.submit(self._try_price_source, name, token_id, True)
+            pending[future] = name
+
+            price, source = self._first_valid_price(pending, timeout=self.price_hedge_delay)
+            if price:
+                return price, source
+
+        # Toutes les sources sont lancées: attendre les réponses restantes
+        return self._first_valid_price(pending, timeout=None)
+
+    @staticmethod
+    def _first_valid_price(pending: Dict, timeout: Optional[float]) -> Tuple[Optional[float], Optional[str]]:
+        """
+        Attend le premier prix valide parmi les futures en cours.
+
+        Les futures terminées sont retirées de `pending`. Retourne (None, None)
+        si `timeout` expire ou si toutes ont répondu sans prix.
+        """
+        deadline = None if timeout is None else time.time() + timeout
+
+        while pending:
+            remaining = None if deadline is None else deadline - time.time()
+            if remaining is not None and remaining <= 0:
+                break
+
+            done, _ = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            if not done:
+                break
+
+            for future in done:
+                name = pending.pop(future)
+                price = future.result()
+                if price:
+                    return price, name
+
+        return None, None
+
+    def _try_price_source(self, name: str, token_id: str, allowed: bool = False) -> Optional[float]:
+        """
+        Appelle une source de prix; les erreurs sont loggées et donnent None.
 
-        # Method 3: Try order book
+        Les sources réseau passent par leur circuit breaker (`allowed` = déjà
+        autorisée par l'appelant) et leur latence est enregistrée.
+        """
+        if name == 'gamma':
+            started = time.perf_counter()
+            try:
+                price = self._price_from_gamma(token_id)
+            except Exception as e:
+                metrics.observe("price.gamma", time.perf_counter() - started, error=True)
+                log.warning("⚠️  Method 4 (Gamma API) failed: %s", e)
+                return None
+            metrics.observe("price.gamma", time.perf_counter() - started, error=not price)
+            return price
+
+        _, method_name, label = next(s for s in self.PRICE_SOURCES if s[0] == name)
+        health = self.price_source_health[name]
+        if not allowed and not health.allow():
+            return None
+
+        started = time.perf_counter()
         try:
-            if hasattr(self.client, 'get_order_book'):
-                book = self.client.get_order_book(token_id)
-                if book:
-                    # OrderBookSummary object has attributes, not dict keys
-                    best_bid = None
-                    best_ask = None
-
-                    # Try attribute access first (OrderBookSummary object)
-                    if hasattr(book, 'bids') and book.bids and len(book.bids) > 0:
-                        bid_item = book.bids[0]
-                        if hasattr(bid_item, 'price'):
-                            best_bid = float(bid_item.price)
-                        elif isinstance(bid_item, dict):
-                            best_bid = float(bid_item['price'])
-
-                    if hasattr(book, 'asks') and book.asks and len(book.asks) > 0:
-                        ask_item = book.asks[0]
-                        if hasattr(ask_item, 'price'):
-                            best_ask = float(ask_item.price)
-                        elif isinstance(ask_item, dict):
-                            best_ask = float(ask_item['price'])
-
-                    if best_bid and best_ask:
-                        mid_price = (best_bid + best_ask) / 2
-                        print(f"✓ Got mid price from order book: ${mid_price:.4f}")
-                        return mid_price
-                    elif best_bid:
-                        print(f"✓ Got bid price from order book: ${best_bid:.4f}")
-                        return best_bid
-                    elif best_ask:
-                        print(f"✓ Got ask price from order book: ${best_ask:.4f}")
-                        return best_ask
+            price = getattr(self, method_name)(token_id)
         except Exception as e:
-            print(f"⚠️  Method 3 (order book) failed: {e}")
+            self.record_price_source(name, time.perf_counter() - started, None, error=True)
+            log.warning("⚠️  %s failed: %s", label, e)
+            return None
+
+        self.record_price_source(name, time.perf_counter() - started, price)
+        return price
+
+    def record_price_source(self, name: str, elapsed: float, price: Optional[float], error: bool = False):
+        """
+        Enregistre un appel à une source réseau (circuit breaker + metrics).
+
+        Utilisé aussi par AsyncPolymarketLolBot, pour que les deux variantes
+        partagent breakers et histogrammes.
+        """
+        # Sans prix (token illiquide): baisse le taux de succès mais n'ouvre pas
+        # le circuit, qui ne réagit qu'aux exceptions et aux 5xx
+        self.price_source_health[name].record(elapsed, ok=bool(price), error=error)
+        metrics.observe(f"price.{name}", elapsed, error=error or not price)
+
+    def _price_from_prices_endpoint(self, token_id: str) -> Optional[float]:
+        """Method 1: simplified prices endpoint."""
+        # The correct format is /prices?token_id=XXX (singular, not plural)
+        url = f"https://clob.polymarket.com/prices?token_id={token_id}"
+        return self._parse_prices_response(self.session.get(url, timeout=10), token_id)
+
+    def _price_from_last_trade(self, token_id: str) -> Optional[float]:
+        """Method 2: py-clob-client's last trade price."""
+        if not hasattr(self.client, 'get_last_trade_price'):
+            return None
+
+        price = self._parse_last_trade(self.client.get_last_trade_price(token_id))
+        if price:
+            log.debug("✓ Got price from last trade: $%.4f", price)
+        return price
+
+    def _price_from_order_book(self, token_id: str) -> Optional[float]:
+        """Method 3: order book mid (or best side)."""
+        if not hasattr(self.client, 'get_order_book'):
+            return None
+
+        price = self._parse_order_book(self.client.get_order_book(token_id))
+        if price:
+            log.debug("✓ Got price from order book: $%.4f", price)
+        return price
+
+    # Parsing des réponses, partagé avec AsyncPolymarketLolBot
+
+    @classmethod
+    def _parse_prices_response(cls, response, token_id: str) -> Optional[float]:
+        """
+        Prix d'un token dans une réponse /prices (requests ou httpx).
+
+        Un 5xx (après les retries du transport) lève une erreur: il compte
+        pour le circuit breaker de la source.
+        """
+        if response.status_code >= 500:
+            response.raise_for_status()
+        if response.status_code != 200:
+            return None
+
+        data = response.json()
+        if isinstance(data, dict) and token_id in data:
+            return cls._parse_prices_entry(data[token_id])
+        return None
+
+    @staticmethod
+    def _parse_last_trade(result) -> Optional[float]:
+        """Prix du dernier trade: dict ({"price": ...}), float ou string."""
+        if not result:
+            return None
+
+        if isinstance(result, dict):
+            # Try common dict keys
+            result = result.get('price') or result.get('last_price') or result.get('last')
+            if not result:
+                return None
+
+        price = float(result)
+        return price if price > 0 else None
+
+    @staticmethod
+    def _parse_order_book(book) -> Optional[float]:
+        """
+        Mid du carnet (ou meilleur côté disponible).
+
+        Accepte un OrderBookSummary du SDK ou le JSON de /book. Le meilleur bid
+        est le prix max et le meilleur ask le prix min, quel que soit l'ordre
+        des niveaux renvoyé par l'API (même règle que PriceStream).
+        """
+        if not book:
+            return None
+
+        def level_prices(side: str) -> List[float]:
+            levels = book.get(side) if isinstance(book, dict) else getattr(book, side, None)
+            prices = []
+            for level in levels or []:
+                price = level.get('price') if isinstance(level, dict) else getattr(level, 'price', None)
+                if price is not None:
+                    prices.append(float(price))
+            return prices
+
+        bids = level_prices('bids')
+        asks = level_prices('asks')
+        best_bid = max(bids) if bids else None
+        best_ask = min(asks) if asks else None
+
+        if best_bid and best_ask:
+            return (best_bid + best_ask) / 2
+        return best_bid or best_ask
+
+    def _price_from_gamma(self, token_id: str) -> Optional[float]:
+        """Method 4: Gamma outcome prices from the market catalog."""
+        log.debug("🔍 Trying Gamma API for token %.20s...", token_id)
+        # Un seul lookup: marché et prix viennent du même snapshot du catalogue
+        found = self.catalog.find_token(token_id)
+        price = self.catalog.outcome_price(*found) if found else None
+
+        if price is not None:
+            log.debug("✓ Got price from Gamma API: $%.4f (market: %.50s...)",
+                      price, found[0].get('question', 'Unknown'))
+            return price
+
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("   Token not found in %d active markets", len(self.catalog.get_markets()))
+        return None
+
+    def stream_prices(self, token_ids: List[str], callback=None) -> bool:
+        """
+        Abonne des tokens au flux WebSocket.
+
+        Une fois le flux connecté, get_token_price lit ces tokens en mémoire.
+
+        Args:
+            token_ids: Tokens à suivre
+            callback: Optionnel, appelé avec (token_id, quote) à chaque mise à jour
+
+        Returns:
+            False si le streaming est indisponible (polling HTTP seulement)
+        """
+        if not self.stream.available:
+            return False
+        if callback:
+            self.stream.add_listener(callback)
+        self.stream.subscribe(token_ids)
+        return True
+
+    def get_token_prices(self, token_ids: List[str], deadline: Optional[float] = None) -> Dict[str, Optional[float]]:
+        """
+        Récupère les prix de plusieurs tokens en un seul appel.
+
+        Le endpoint CLOB /prices accepte une liste de (token_id, side) en POST.
+        Les tokens absents de la réponse passent par les sources réseau en
+        parallèle (au plus `deadline` secondes), puis par un seul snapshot du
+        catalogue Gamma partagé par tous les tokens restants.
+
+        Args:
+            token_ids: Liste des IDs de tokens
+            deadline: Attente max du fallback réseau (défaut: PRICE_BATCH_DEADLINE)
+
+        Returns:
+            Dict token_id -> prix (None si introuvable)
+        """
+        # Dédupliquer en gardant l'ordre
+        token_ids = [t for t in dict.fromkeys(token_ids) if t]
+        prices = {token_id: self.stream.get_price(token_id) for token_id in token_ids}
+        missing = [token_id for token_id, price in prices.items() if price is None]
+        if not missing:
+            return prices
 
-        # Method 4: Try Gamma API (market data) - Most reliable for active markets
         try:
-            print(f"🔍 Trying Gamma API for token {token_id[:20]}...")
-            gamma_url = "https://gamma-api.polymarket.com/markets?limit=500&closed=false"
-            response = self.session.get(gamma_url, timeout=15)
+            url = "https://clob.polymarket.com/prices"
+            body = [
+                {"token_id": token_id, "side": side}
+                for token_id in missing
+                for side in ("BUY", "SELL")
+            ]
+            response = self.session.post(url, json=body, timeout=10)
 
             if response.status_code == 200:
-                markets = response.json()
-                print(f"   Searching through {len(markets)} active markets...")
-
-                for market in markets:
-                    # Try clobTokenIds first (newer format)
-                    clob_token_ids = market.get('clobTokenIds', [])
-                    if clob_token_ids:
-                        # Parse JSON string if needed
-                        if isinstance(clob_token_ids, str):
-                            import json
-                            clob_token_ids = json.loads(clob_token_ids)
-
-                        for i, clob_token_id in enumerate(clob_token_ids):
-                            if clob_token_id == token_id:
-                                # Found it! Get price from outcomePrices
-                                outcome_prices = market.get('outcomePrices')
-                                if isinstance(outcome_prices, str):
-                                    import json
-                                    outcome_prices = json.loads(outcome_prices)
-
-                                if outcome_prices and i < len(outcome_prices):
-                                    price = float(outcome_prices[i])
-                                    if price > 0:
-                                        market_name = market.get('question', 'Unknown')[:50]
-                                        print(f"✓ Got price from Gamma API: ${price:.4f} (market: {market_name}...)")
-                                        return price
-
-                    # Fallback: try old tokens format
-                    tokens = market.get('tokens', [])
-                    for i, token in enumerate(tokens):
-                        token_id_field = token.get('token_id') if isinstance(token, dict) else None
-                        if token_id_field == token_id:
-                            outcome_prices = market.get('outcomePrices')
-                            if isinstance(outcome_prices, str):
-                                import json
-                                outcome_prices = json.loads(outcome_prices)
-
-                            if outcome_prices and i < len(outcome_prices):
-                                price = float(outcome_prices[i])
-                                if price > 0:
-                                    market_name = market.get('question', 'Unknown')[:50]
-                                    print(f"✓ Got price from Gamma API (legacy): ${price:.4f} (market: {market_name}...)")
-                                    return price
-
-                print(f"   Token not found in {len(markets)} active markets")
+                data = response.json()
+                if isinstance(data, dict):
+                    for token_id in missing:
+                        prices[token_id] = self._parse_prices_entry(data.get(token_id))
             else:
-                print(f"   Gamma API returned status {response.status_code}")
+                log.warning("⚠️  Bulk prices endpoint returned status %s", response.status_code)
         except Exception as e:
-            print(f"⚠️  Method 4 (Gamma API) failed: {e}")
-            import traceback
-            traceback.print_exc()
+            log.warning("⚠️  Bulk prices endpoint failed: %s", e)
+
+        # Fallback: sources réseau, un token par worker. Séquentiel par token:
+        # le mode hedged soumettrait dans le même pool et pourrait s'y bloquer.
+        missing = [token_id for token_id, price in prices.items() if price is None]
+        if missing:
+            timeout = self.price_batch_deadline if deadline is None else deadline
+            until = time.time() + timeout
+            futures = {
+                self._batch_executor.submit(self._sequential_price_sources, token_id, until): token_id
+                for token_id in missing
+            }
+            done, not_done = wait(futures, timeout=timeout)
+            # Hors délai: les lookups pas encore démarrés sont annulés, ceux en
+            # cours s'arrêtent après leur source actuelle (`until`)
+            for future in not_done:
+                future.cancel()
+            for future in done:
+                try:
+                    prices[futures[future]] = future.result()[0]
+                except Exception as e:
+                    log.warning("⚠️  Price fallback failed for token %.20s...: %s", futures[future], e)
 
-        print(f"❌ All 4 methods failed for token {token_id[:20]}...")
-        return None
+        # Dernier recours: un seul snapshot Gamma pour tous les restants
+        missing = [token_id for token_id, price in prices.items() if price is None]
+        if missing:
+            try:
+                self.catalog.get_markets()
+                for token_id in missing:
+                    prices[token_id] = self.catalog.get_outcome_price(token_id)
+            except Exception as e:
+                log.warning("⚠️  Method 4 (Gamma API) failed: %s", e)
+
+        return prices
+
+    @staticmethod
+    def _parse_prices_entry(entry) -> Optional[float]:
+        """
+        Convertit une entrée de la réponse /prices en prix.
+
+        L'entrée peut être un prix brut ou un dict {"BUY": "0.52", "SELL": "0.54"};
+        dans ce cas on prend le milieu des côtés disponibles.
+        """
+        if entry is None:
+            return None
+        try:
+            if isinstance(entry, dict):
+                sides = [float(v) for v in entry.values() if v not in (None, "")]
+                sides = [p for p in sides if p > 0]
+                return sum(sides) / len(sides) if sides else None
+            price = float(entry)
+            return price if price > 0 else None
+        except (TypeError, ValueError):
+            return None
 
     def place_bet(
         self,
@@ -312,20 +1565,22 @@ class PolymarketLolBot:
         Note:
             - Si total_amount est fourni, size est calculé automatiquement
             - Sinon, utilise size (ajusté si total < $1)
+            - Chaque étape est chronométrée dans metrics (place_bet.*)
         """
+        started = time.perf_counter()
+
         # Validation prix
         if not (0.01 <= price <= 0.99):
-            print("❌ Prix doit être entre 0.01 et 0.99")
+            log.error("❌ Prix doit être entre 0.01 et 0.99")
             return {'success': False, 'error': 'Price must be between 0.01 and 0.99'}
 
         # Calculer size à partir de total_amount si fourni
         if total_amount is not None:
             size = total_amount / price
-            print(f"\n💡 Calcul automatique: Pour dépenser ${total_amount:.2f} à ${price:.4f}")
-            print(f"   → Taille calculée: {size:.2f} shares")
+            log.debug("💡 Calcul automatique: $%.2f à $%.4f -> %.2f shares", total_amount, price, size)
 
         elif size is None:
-            print("❌ Vous devez fournir soit 'size' soit 'total_amount'")
+            log.error("❌ Vous devez fournir soit 'size' soit 'total_amount'")
             return {'success': False, 'error': 'Must provide either size or total_amount'}
 
         # Calculer le montant total
@@ -336,25 +1591,35 @@ class PolymarketLolBot:
         if calculated_total < min_total:
             size = min_total / price
             calculated_total = price * size
-            print(f"\n⚠️  Ajusté pour respecter le minimum de $1")
+            log.info("⚠️  Ajusté pour respecter le minimum de $1")
 
-        print(f"\n💰 Préparation du pari:")
-        print(f"   Token: {token_id[:30]}...")
-        print(f"   Side: {side}")
-        print(f"   Prix: ${price:.4f}")
-        print(f"   Taille: {size:.4f} shares")
-        print(f"   💵 Montant total: ${calculated_total:.2f}")
+        if confirm:
+            # Récapitulatif interactif avant confirmation (CLI)
+            print(f"\n💰 Préparation du pari:")
+            print(f"   Token: {token_id[:30]}...")
+            print(f"   Side: {side}")
+            print(f"   Prix: ${price:.4f}")
+            print(f"   Taille: {size:.4f} shares")
+            print(f"   💵 Montant total: ${calculated_total:.2f}")
+        else:
+            log.info("💰 Pari: %s %.4f shares @ $%.4f ($%.2f) token %.30s...",
+                     side, size, price, calculated_total, token_id)
 
         # Validation: montant total minimum
         if calculated_total < min_total:
-            print(f"❌ Montant total minimum: ${min_total}")
+            log.error("❌ Montant total minimum: $%s", min_total)
             return {'success': False, 'error': f'Minimum total amount: ${min_total}'}
 
+        metrics.observe("place_bet.validate", time.perf_counter() - started)
+
         if confirm:
+            waited = time.perf_counter()
             confirmation = input("\n⚠️  Confirmer le pari? (y/n): ")
             if confirmation.lower() != 'y':
                 print("❌ Pari annulé")
                 return {'success': False, 'error': 'Bet cancelled by user'}
+            # Le temps de confirmation n'est pas de la latence
+            started += time.perf_counter() - waited
 
         try:
             # Créer l'ordre
@@ -365,32 +1630,108 @@ class PolymarketLolBot:
                 side=side.upper()
             )
 
-            print("🛠️  Création de l'ordre signé...")
-            signed_order = self.client.create_order(args)
+            log.debug("🛠️  Création de l'ordre signé...")
+            with metrics.span("place_bet.sign"):
+                signed_order = self.client.create_order(args)
+
+            response = self._post_signed_order(signed_order, echo=confirm)
+            metrics.observe("place_bet.total", time.perf_counter() - started)
+            return response
+
+        except Exception as e:
+            metrics.observe("place_bet.total", time.perf_counter() - started, error=True)
+            log.error("❌ Erreur placement: %s", e)
+            return {'success': False, 'error': str(e)}
+
+    def place_bet_fast(
+        self,
+        token_id: str,
+        price: float,
+        amount: float,
+        price_buffer_pct: float = 0.5
+    ) -> Optional[Dict]:
+        """
+        Achat rapide (GUI/web): poste un ordre pré-signé si disponible.
+
+        Sans ordre pré-signé au bon prix, retombe sur place_bet avec les
+        mêmes buffers (apply_price_buffers).
+
+        Args:
+            token_id: ID du token (outcome)
+            price: Prix affiché au moment du clic
+            amount: Montant saisi par l'utilisateur (avant buffer)
+            price_buffer_pct: Buffer de prix en %
+
+        Returns:
+            Réponse de l'API, avec 'price' et 'amount' réellement envoyés
+        """
+        started = time.perf_counter()
+        entry = self.presigner.take(token_id, amount, price_buffer_pct, price)
 
-            print("🚀 Envoi de l'ordre...")
-            # Gestion du bug SDK (attribut vs dict)
+        if entry is not None:
+            log.info("⚡ Ordre pré-signé: %.30s... @ $%.4f", token_id, entry['price'])
             try:
+                response = self._post_signed_order(entry['order'])
+            except Exception as e:
+                log.error("❌ Erreur placement: %s", e)
+                response = {'success': False, 'error': str(e)}
+            adjusted_price, total_amount = entry['price'], entry['total_amount']
+        else:
+            adjusted_price, total_amount = apply_price_buffers(price, amount, price_buffer_pct)
+            response = self.place_bet(
+                token_id=token_id,
+                side="BUY",
+                price=adjusted_price,
+                total_amount=total_amount,
+                confirm=False
+            )
+
+        # Latence clic -> ack, par chemin (ordre pré-signé ou signé à la volée)
+        metrics.observe(
+            "place_bet_fast.presigned" if entry is not None else "place_bet_fast.signed",
+            time.perf_counter() - started,
+            error=not (isinstance(response, dict) and response.get('success'))
+        )
+
+        if isinstance(response, dict):
+            response = dict(response, price=adjusted_price, amount=total_amount)
+        return response
+
+    def _post_signed_order(self, signed_order, echo: bool = False) -> Optional[Dict]:
+        """
+        Envoie un ordre déjà signé et affiche le résultat.
+
+        Args:
+            signed_order: Ordre signé par create_order
+            echo: Résultat affiché sur stdout (CLI), visible même avec LOG_QUIET
+        """
+        log.debug("🚀 Envoi de l'ordre...")
+        # Gestion du bug SDK (attribut vs dict)
+        try:
+            with metrics.span("place_bet.post"):
                 response = self.client.post_order(signed_order)
-            except AttributeError:
+        except AttributeError:
+            with metrics.span("place_bet.post_retry"):
                 as_dict = dataclasses.asdict(signed_order) if not isinstance(signed_order, dict) else signed_order
                 response = self.client.post_order(as_dict)
 
-            # Debug: afficher la réponse complète
-            print(f"\n📋 Réponse API complète: {response}")
+        # Debug: réponse complète
+        log.debug("📋 Réponse API complète: %s", response)
 
-            if response and response.get('success'):
-                print(f"✅ PARI PLACÉ!")
+        if response and response.get('success'):
+            if echo:
+                print(f"✅ PARI PLACÉ! {response.get('orderID', '')}")
+                print(f"🔗 Vérifie ton compte: https://polymarket.com/\n")
             else:
-                error_msg = response.get('error', response.get('errorMsg', 'Unknown error')) if response else 'No response'
+                log.info("✅ PARI PLACÉ! %s", response.get('orderID', ''))
+        else:
+            error_msg = response.get('error', response.get('errorMsg', 'Unknown error')) if response else 'No response'
+            if echo:
                 print(f"⚠️  ATTENTION: {error_msg}")
+            else:
+                log.warning("⚠️  ATTENTION: %s", error_msg)
 
-            print(f"🔗 Vérifie ton compte: https://polymarket.com/\n")
-            return response
-
-        except Exception as e:
-            print(f"❌ Erreur placement: {e}")
-            return {'success': False, 'error': str(e)}
+        return response
 
     def quick_bet_on_team(
         self,
@@ -433,131 +1774,85 @@ class PolymarketLolBot:
 
     def get_user_positions(self, market_id: Optional[str] = None) -> List[Dict]:
         """
-        Get user's current positions from Polymarket API.
+        Get user's current positions from the trades (fills) history.
 
         Args:
             market_id: Optional market ID to filter positions
 
         Returns:
             List of dicts with: token_id, market_id, outcome, net_size,
-            avg_entry_price, current_price, unrealized_pnl, unrealized_roi
+            avg_entry_price, realized_pnl, current_price, unrealized_pnl,
+            unrealized_roi
+
+        Note:
+            Only trades since the last sync are fetched and folded into the
+            persisted ledger (see positions.PositionTracker). All positions
+            are priced in one batch (get_token_prices), so a refresh is
+            bounded by PRICE_BATCH_DEADLINE instead of growing with the
+            number of positions.
         """
+        started = time.perf_counter()
         try:
-            # Get user's open orders and trades
-            # Note: ClobClient may have get_orders() or similar methods
-            # We'll use the API directly if needed
-
-            # Try to get orders from the client
-            try:
-                # Attempt to get open orders (may vary by SDK version)
-                orders = self.client.get_orders()
-            except AttributeError:
-                # Fallback: use API directly
-                try:
-                    url = "https://clob.polymarket.com/orders"
-                    headers = {
-                        "Authorization": f"Bearer {self.client.creds.api_key}" if hasattr(self.client, 'creds') else ""
-                    }
-                    response = requests.get(url, headers=headers, timeout=10)
-                    orders = response.json() if response.status_code == 200 else []
-                except Exception:
-                    orders = []
-
-            # Aggregate positions by token_id
-            positions_map = {}
-
-            for order in orders:
-                if not isinstance(order, dict):
-                    continue
-
-                # Skip if filtering by market and this order doesn't match
-                order_market_id = order.get('market', order.get('condition_id'))
-                if market_id and order_market_id != market_id:
-                    continue
-
-                token_id = order.get('asset_id', order.get('token_id'))
-                if not token_id:
-                    continue
-
-                side = order.get('side', 'BUY').upper()
-                size = float(order.get('size', 0))
-                price = float(order.get('price', 0))
-                status = order.get('status', '')
-
-                # Only count filled orders
-                if status.lower() not in ['filled', 'matched', 'active']:
-                    continue
-
-                if token_id not in positions_map:
-                    positions_map[token_id] = {
-                        'token_id': token_id,
-                        'market_id': order_market_id,
-                        'outcome': order.get('outcome', 'Unknown'),
-                        'buy_size': 0.0,
-                        'buy_cost': 0.0,
-                        'sell_size': 0.0,
-                        'sell_revenue': 0.0
-                    }
-
-                pos = positions_map[token_id]
-                if side == 'BUY':
-                    pos['buy_size'] += size
-                    pos['buy_cost'] += size * price
-                elif side == 'SELL':
-                    pos['sell_size'] += size
-                    pos['sell_revenue'] += size * price
-
-            # Calculate net positions and P&L
-            positions = []
-            for token_id, pos in positions_map.items():
-                net_size = pos['buy_size'] - pos['sell_size']
-
-                # Skip closed positions
-                if abs(net_size) < 0.01:
-                    continue
-
-                # Calculate average entry price
-                if net_size > 0:
-                    # Net long position
-                    avg_entry_price = pos['buy_cost'] / pos['buy_size'] if pos['buy_size'] > 0 else 0
-                else:
-                    # Net short position
-                    avg_entry_price = pos['sell_revenue'] / pos['sell_size'] if pos['sell_size'] > 0 else 0
-
-                # Get current price
-                current_price = self.get_token_price(token_id)
-                if current_price is None:
-                    current_price = avg_entry_price
-
-                # Calculate unrealized P&L
-                if net_size > 0:
-                    # Long position: profit if price went up
-                    unrealized_pnl = net_size * (current_price - avg_entry_price)
-                else:
-                    # Short position: profit if price went down
-                    unrealized_pnl = abs(net_size) * (avg_entry_price - current_price)
-
-                # Calculate ROI
-                cost_basis = abs(net_size) * avg_entry_price
-                unrealized_roi = (unrealized_pnl / cost_basis * 100) if cost_basis > 0 else 0
-
-                positions.append({
-                    'token_id': token_id,
-                    'market_id': pos['market_id'],
-                    'outcome': pos['outcome'],
-                    'net_size': net_size,
-                    'avg_entry_price': avg_entry_price,
-                    'current_price': current_price,
-                    'unrealized_pnl': unrealized_pnl,
-                    'unrealized_roi': unrealized_roi
-                })
-
+            self.position_tracker.sync()
+            positions = self.position_tracker.open_positions(market_id)
+            prices = self.get_token_prices([pos['token_id'] for pos in positions])
+
+            positions = [
+                self._value_position(pos, prices.get(pos['token_id']))
+                for pos in positions
+            ]
+            metrics.observe("positions.refresh", time.perf_counter() - started)
             return positions
 
         except Exception as e:
-            print(f"⚠️  Error fetching positions: {e}")
+            metrics.observe("positions.refresh", time.perf_counter() - started, error=True)
+            log.warning("⚠️  Error fetching positions: %s", e)
             return []
 
+    def get_portfolio(self, market_id: Optional[str] = None) -> Dict:
+        """
+        Positions valorisées et totaux du ledger (open_positions, cost_basis,
+        realized_pnl, market_value, unrealized_pnl).
+
+        Les totaux portent sur tout le portefeuille; `market_id` ne filtre
+        que la liste des positions.
+        """
+        positions = self.get_user_positions()
+        prices = {pos['token_id']: pos['current_price'] for pos in positions}
+        summary = self.position_tracker.summary(prices)
+
+        if market_id:
+            positions = [pos for pos in positions if pos.get('market_id') == market_id]
+        return {'positions': positions, 'summary': summary}
+
+    @staticmethod
+    def _value_position(pos: Dict, current_price: Optional[float]) -> Dict:
+        """Add current_price, unrealized_pnl and unrealized_roi to a position."""
+        net_size = pos['net_size']
+        avg_entry_price = pos['avg_entry_price']
+
+        if current_price is None:
+            current_price = avg_entry_price
+
+        # Calculate unrealized P&L
+        if net_size > 0:
+            # Long position: profit if price went up
+            unrealized_pnl = net_size * (current_price - avg_entry_price)
+        else:
+            # Short position: profit if price went down
+            unrealized_pnl = abs(net_size) * (avg_entry_price - current_price)
+
+        # Calculate ROI
+        cost_basis = abs(net_size) * avg_entry_price
+        unrealized_roi = (unrealized_pnl / cost_basis * 100) if cost_basis > 0 else 0
+
+        return dict(
+            pos,
+            current_price=current_price,
+            unrealized_pnl=unrealized_pnl,
+            unrealized_roi=unrealized_roi
+        )
+
     def monitor_markets(self, interval: int = 10):
         """
         Surveille les marchés LoL en temps réel.
@@ -572,6 +1867,12 @@ class PolymarketLolBot:
             while True:
                 markets = self.search_lol_markets()
 
+                # Prix poussés par le WebSocket plutôt que re-demandés à chaque tour
+                self.stream_prices([
+                    token.get("token_id") for market in markets[:5]
+                    for token in market.get("tokens", []) if isinstance(token, dict)
+                ])
+
                 for i, market in enumerate(markets[:5], 1):  # Top 5
                     print(f"\n[{i}] {market.get('question', 'N/A')}")
                     tokens = market.get("tokens", [])
@@ -635,6 +1936,8 @@ def demo_interactive():
 
 
 if __name__ == "__main__":
+    setup_logging()
+
     # Décommenter selon le mode souhaité:
 
     # Mode interactif
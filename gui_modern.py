@@ -5,14 +5,14 @@
 
 import sys
 import json
-import os
 import tkinter as tk
 from tkinter import font
 import threading
-import requests
 from datetime import datetime, timedelta
 from collections import deque
-from bot import PolymarketLolBot
+from bot import PolymarketLolBot, MarketSearchIndex
+from transport import get_transport
+from logger import get_logger, setup_logging
 from dotenv import load_dotenv
 
 # Matplotlib for price chart
@@ -24,23 +24,14 @@ from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 if sys.platform == "win32":
     sys.stdout.reconfigure(encoding='utf-8')
 
-# Load env and setup proxy for GUI requests
+# Load env; GUI requests go through the shared HTTP transport (proxy, pool)
 load_dotenv()
-proxy_http = os.getenv("PROXY_HTTP", "").strip()
-proxy_https = os.getenv("PROXY_HTTPS", "").strip()
+GUI_SESSION = get_transport()
+log = get_logger("gui")
 
-GUI_PROXIES = None
-if proxy_http or proxy_https:
-    GUI_PROXIES = {}
-    if proxy_http:
-        GUI_PROXIES['http'] = proxy_http
-    if proxy_https:
-        GUI_PROXIES['https'] = proxy_https
 
-# Create global session with proxy for GUI requests
-GUI_SESSION = requests.Session()
-if GUI_PROXIES:
-    GUI_SESSION.proxies.update(GUI_PROXIES)
+# Quick amount buttons (also the amounts kept pre-signed)
+QUICK_AMOUNTS = [1, 5, 10, 25, 50, 100]
 
 
 class NeonButton(tk.Canvas):
@@ -169,6 +160,7 @@ class UltraSimplePolymarketGUI:
         self.is_refreshing = False
         self.price_refresh_active = False  # Control price refresh loop
         self.price_refresh_counter = 0  # Count refreshes
+        self.search_after_id = None  # Pending search-as-you-type callback
 
         # Price history for chart (5 minutes = 300 seconds, 1 point per 1 second = 300 points max)
         self.price_history = {
@@ -252,6 +244,7 @@ class UltraSimplePolymarketGUI:
                                     insertbackground=self.neon_cyan)
         self.search_entry.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=5, pady=3)
         self.search_entry.bind("<Return>", lambda e: self.search_markets())
+        self.search_entry.bind("<KeyRelease>", lambda e: self.search_as_you_type())
 
         search_btn = tk.Label(search_frame, text="SEARCH", bg=self.bg_secondary,
                             fg=self.neon_cyan, font=("Arial", 7, "bold"),
@@ -366,6 +359,7 @@ class UltraSimplePolymarketGUI:
                                     insertbackground=self.neon_cyan,
                                     justify=tk.CENTER)
         self.amount_entry.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, pady=3)
+        self.amount_entry.bind("<FocusOut>", lambda e: self.presign_orders())
 
         # Buffer (right)
         buffer_col = tk.Frame(config_row, bg=self.bg)
@@ -390,12 +384,13 @@ class UltraSimplePolymarketGUI:
                                     insertbackground=self.neon_magenta,
                                     justify=tk.CENTER)
         self.buffer_entry.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, pady=3)
+        self.buffer_entry.bind("<FocusOut>", lambda e: self.presign_orders())
 
         # Quick amounts
         quick_frame = tk.Frame(bet_controls, bg=self.bg)
         quick_frame.pack(fill=tk.X, pady=(0, 8))
 
-        for amount in [1, 5, 10, 25, 50, 100]:
+        for amount in QUICK_AMOUNTS:
             btn = tk.Label(quick_frame, text=f"{amount}", bg=self.bg_secondary,
                           fg=self.neon_cyan, font=("Arial", 7),
                           cursor="hand2", width=5, height=1, padx=3, pady=2)
@@ -570,31 +565,18 @@ class UltraSimplePolymarketGUI:
                 else:
                     self.log(f"Searching: {query}", "cyan")
 
-                # Increased limit to 1000 to catch more markets
-                resp = GUI_SESSION.get("https://gamma-api.polymarket.com/markets?limit=1000&closed=false", timeout=15)
-                all_markets = resp.json()
-
-                # If no query, show all
-                if not query:
-                    filtered = all_markets
+                # Shared catalog cache from the bot (no download per search)
+                if self.bot:
+                    filtered = self.filter_catalog(query)
                 else:
-                    # Better search: check question, description, AND tags
-                    keywords = query.lower().split()
-                    filtered = []
-
-                    for market in all_markets:
-                        question = market.get("question", "").lower()
-                        description = market.get("description", "").lower()
-                        tags = " ".join(market.get("tags", [])).lower()
-
-                        # Combine all searchable text
-                        searchable = f"{question} {description} {tags}"
+                    resp = GUI_SESSION.get("https://gamma-api.polymarket.com/markets?limit=1000&closed=false", timeout=15)
+                    all_markets = resp.json()
 
-                        # Check if ALL keywords are present (better than ANY)
-                        # But also check if the full query is present as-is
-                        full_query = query.lower()
-                        if full_query in searchable or all(kw in searchable for kw in keywords):
-                            filtered.append(market)
+                    # If no query, show all
+                    if not query:
+                        filtered = all_markets
+                    else:
+                        filtered = MarketSearchIndex(all_markets).search(query, match_all=True)
 
                 self.markets = filtered
                 self.root.after(0, self.display_markets)
@@ -611,6 +593,28 @@ class UltraSimplePolymarketGUI:
 
         threading.Thread(target=_search, daemon=True).start()
 
+    def filter_catalog(self, query):
+        """Filter the bot's cached catalog (ALL keywords must match)."""
+        if not query:
+            return list(self.bot.catalog.get_markets())
+        return self.bot.catalog.search(query, match_all=True)
+
+    def search_as_you_type(self):
+        """Filter locally on each keystroke once the catalog is loaded."""
+        if not self.bot or self.bot.catalog.age is None:
+            return
+
+        # Debounce: only filter once typing pauses
+        if self.search_after_id:
+            self.root.after_cancel(self.search_after_id)
+
+        def _filter():
+            self.search_after_id = None
+            self.markets = self.filter_catalog(self.search_var.get().strip())
+            self.display_markets()
+
+        self.search_after_id = self.root.after(150, _filter)
+
     def load_from_url(self):
         """Load market directly from Polymarket URL."""
         url = self.url_var.get().strip()
@@ -761,6 +765,10 @@ class UltraSimplePolymarketGUI:
         self.price_refresh_active = False
         self.price_refresh_counter = 0
 
+        # Stop streaming the previous market's tokens
+        if self.bot and self.selected_market:
+            self.bot.stream.unsubscribe(json.loads(self.selected_market.get("clobTokenIds", "[]")))
+
         self.selected_market = market
 
         # Reset price history for new market
@@ -785,9 +793,13 @@ class UltraSimplePolymarketGUI:
         loading.pack(pady=10)
 
         self.log(f"Selected: {question[:60]}...", "magenta")
-        print(f"\n=== MARKET SELECTED ===")
-        print(f"Question: {question[:60]}")
-        print(f"Tokens: {tokens[:2]}")
+        log.info("Market selected: %.60s tokens=%s", question, tokens[:2])
+
+        # Live prices pushed over WebSocket (the refresh loop then reads memory)
+        if self.bot:
+            self.bot.warmer.ping()  # the buy POST rides a hot connection
+            self.bot.stream_prices(tokens[:2])
+            self.presign_orders()
 
         # Disable buttons while loading
         self.buy_yes_btn.disable()
@@ -803,7 +815,7 @@ class UltraSimplePolymarketGUI:
             return
 
         self.price_refresh_counter += 1
-        print(f"\n[Refresh #{self.price_refresh_counter}] Fetching prices...")
+        log.debug("[Refresh #%d] Fetching prices...", self.price_refresh_counter)
 
         # Parse market data
         outcomes = json.loads(self.selected_market.get("outcomes", "[]"))
@@ -813,9 +825,8 @@ class UltraSimplePolymarketGUI:
             try:
                 live_prices = []
                 for i, token_id in enumerate(tokens[:2]):  # Only first 2 (YES/NO)
-                    print(f"  → Fetching price for token {i} ({token_id[:20]}...)...")
                     price = self.bot.get_token_price(token_id) if self.bot else None
-                    print(f"    Got: ${price:.4f}" if price else "    Got: None")
+                    log.debug("  token %d (%.20s...): %s", i, token_id, price)
                     live_prices.append(price)
 
                 # Update UI
@@ -852,14 +863,15 @@ class UltraSimplePolymarketGUI:
                         self.buy_no_btn.config(text=f"BUY {outcome_1}\n${live_prices[1]:.4f}")
                         self.buy_yes_btn.enable()
                         self.buy_no_btn.enable()
-                        print(f"[Refresh #{self.price_refresh_counter}] ✓ {outcomes[0]}: ${live_prices[0]:.4f} | {outcomes[1]}: ${live_prices[1]:.4f}")
+                        log.debug("[Refresh #%d] ✓ %s: $%.4f | %s: $%.4f", self.price_refresh_counter,
+                                  outcomes[0], live_prices[0], outcomes[1], live_prices[1])
                         # Don't log every refresh to avoid spam
                         # self.log(f"🔴 Live #{self.price_refresh_counter}: {outcomes[0]} | {outcomes[1]}", "green")
 
                 self.root.after(0, _update_ui)
 
             except Exception as e:
-                print(f"[Refresh #{self.price_refresh_counter}] ✗ Error: {e}")
+                log.warning("[Refresh #%d] ✗ Error: %s", self.price_refresh_counter, e)
                 self.root.after(0, lambda: self.log(f"Price fetch error: {e}", "red"))
 
         threading.Thread(target=_fetch, daemon=True).start()
@@ -872,6 +884,20 @@ class UltraSimplePolymarketGUI:
         """Définir le montant."""
         self.amount_var.set(str(float(amount)))
 
+    def presign_orders(self):
+        """Keep signed BUY orders ready for the selected market (PRESIGN_ORDERS)."""
+        if not self.bot or not self.selected_market:
+            return
+
+        tokens = json.loads(self.selected_market.get("clobTokenIds", "[]"))
+        try:
+            amounts = [float(self.amount_var.get())] + QUICK_AMOUNTS
+            price_buffer_pct = float(self.buffer_var.get())
+        except ValueError:
+            return
+
+        self.bot.presigner.watch(tokens[:2], amounts=amounts, price_buffer_pct=price_buffer_pct)
+
     def fast_buy(self, outcome_idx):
         """Ultra-fast buy - no confirmation, minimal buffer."""
         if not self.selected_market:
@@ -920,10 +946,6 @@ class UltraSimplePolymarketGUI:
         except:
             price_buffer_pct = 0.5  # Default to 0.5% if invalid
 
-        # AMOUNT buffer is always 1% (hard-coded for safety - ensures we stay above $1 min)
-        amount_buffer_pct = 1.0
-        amount_multiplier = 1.01  # 1% buffer
-
         # Disable buttons during execution
         self.buy_yes_btn.disable()
         self.buy_no_btn.disable()
@@ -931,27 +953,22 @@ class UltraSimplePolymarketGUI:
         # Execute in background thread
         def _buy():
             try:
-                # Apply fixed 0.5% buffer to amount (safety)
-                safe_amount = amount * amount_multiplier
-
-                # Apply user-configurable buffer to price
-                remaining_to_max = 0.99 - price
-                price_buffer = min(price * (price_buffer_pct / 100), remaining_to_max)  # User buffer %, capped at max
-                adjusted_price = min(0.99, price + price_buffer)
-
-                # Detailed log showing all calculations
-                self.root.after(0, lambda: self.log(
-                    f"💰 BUY {outcome}: ${amount:.2f} → ${safe_amount:.2f} (+1%) | Price: ${price:.4f} → ${adjusted_price:.4f} (+{price_buffer_pct}%)", "cyan"
-                ))
-
-                result = self.bot.place_bet(
+                # Posts a pre-signed order when one is ready at this price,
+                # otherwise signs with the same +1% amount / +buffer% price
+                result = self.bot.place_bet_fast(
                     token_id=token_id,
-                    side="BUY",
-                    price=adjusted_price,
-                    total_amount=safe_amount,
-                    confirm=False
+                    price=price,
+                    amount=amount,
+                    price_buffer_pct=price_buffer_pct
                 )
 
+                # Detailed log showing all calculations
+                if result and result.get('price'):
+                    safe_amount, adjusted_price = result['amount'], result['price']
+                    self.root.after(0, lambda: self.log(
+                        f"💰 BUY {outcome}: ${amount:.2f} → ${safe_amount:.2f} (+1%) | Price: ${price:.4f} → ${adjusted_price:.4f} (+{price_buffer_pct}%)", "cyan"
+                    ))
+
                 if result and result.get('success'):
                     order_id = result.get('orderID', 'N/A')[:12]
                     self.root.after(0, lambda: self.log(f"✓ BUY SUCCESS: {order_id}", "green"))
@@ -972,6 +989,7 @@ class UltraSimplePolymarketGUI:
 
 
 def main():
+    setup_logging()
     root = tk.Tk()
     app = UltraSimplePolymarketGUI(root)
     root.mainloop()
@@ -0,0 +1,31 @@
+"""
+Gunicorn settings for web_app (production entry point).
+
+    gunicorn -c gunicorn.conf.py web_app:app
+
+Threaded workers: a slow /api/markets call no longer delays a /api/bet, and
+SSE price streams each hold a thread, not a whole worker. Price caches and
+the WebSocket feed live in each worker process, so prefer more threads over
+more workers.
+
+Thread budget: web_app caps open streams at PRICE_FEED_MAX_STREAMS per
+worker, and the default WEB_THREADS keeps 32 threads on top of that for API
+calls, so open browser tabs cannot starve /api/bet or /api/health.
+"""
+
+import os
+
+bind = f"0.0.0.0:{os.getenv('WEB_PORT', '8080')}"
+worker_class = "gthread"
+workers = int(os.getenv("WEB_WORKERS", "1"))
+threads = int(os.getenv("WEB_THREADS", str(int(os.getenv("PRICE_FEED_MAX_STREAMS", "16")) + 32)))
+
+# Long-lived SSE responses: the worker heartbeat is independent of requests
+timeout = 120
+keepalive = 5
+
+
+def post_worker_init(worker):
+    """Start the log queue listener in each worker (threads do not survive fork)"""
+    from logger import setup_logging
+    setup_logging()
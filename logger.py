@@ -0,0 +1,105 @@
+"""
+Logging du bot: niveaux, format structuré, écriture non bloquante.
+
+Les modules loguent via get_logger(__name__) sous le namespace "polymarket".
+setup_logging() est appelé par les points d'entrée (CLI bot.py, GUI, web app,
+workers gunicorn), jamais à l'import: importer bot depuis un test ou un autre
+programme ne touche pas à sa configuration de logging.
+Les records passent par une QueueHandler: le thread appelant ne fait qu'un
+put() dans une file, un QueueListener écrit sur stdout en arrière-plan.
+Sur les chemins chauds (prix, pari), un log désactivé ne coûte qu'un test
+de niveau.
+
+Variables d'environnement:
+    LOG_LEVEL    DEBUG, INFO, WARNING, ERROR (défaut INFO)
+    LOG_QUIET    true = production: seulement WARNING et plus (défaut false)
+    LOG_FORMAT   text ou json (défaut text)
+"""
+
+import os
+import sys
+import json
+import queue
+import atexit
+import logging
+import threading
+from logging.handlers import QueueHandler, QueueListener
+
+ROOT_LOGGER = "polymarket"
+
+_listener = None
+_setup_lock = threading.Lock()
+
+
+class JsonFormatter(logging.Formatter):
+    """Une ligne JSON par record (ts, level, logger, msg, + extras)."""
+
+    RESERVED = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime'}
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': round(record.created, 3),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        # Champs passés via extra={...}
+        for key, value in vars(record).items():
+            if key not in self.RESERVED:
+                entry[key] = value
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def setup_logging(level: str = None, quiet: bool = None, fmt: str = None) -> logging.Logger:
+    """
+    Configure le logger "polymarket" (une seule fois par process).
+
+    Args:
+        level: Niveau (défaut: LOG_LEVEL ou INFO)
+        quiet: Mode production, WARNING minimum (défaut: LOG_QUIET)
+        fmt: "text" ou "json" (défaut: LOG_FORMAT ou text)
+
+    Returns:
+        Le logger racine du bot
+    """
+    global _listener
+
+    root = logging.getLogger(ROOT_LOGGER)
+    with _setup_lock:
+        if _listener is not None:
+            return root
+
+        level = (level or os.getenv("LOG_LEVEL", "INFO")).upper()
+        if not isinstance(logging.getLevelName(level), int):
+            level = "INFO"
+        if quiet is None:
+            quiet = os.getenv("LOG_QUIET", "false").lower() in ("1", "true", "yes")
+        if quiet and logging.getLevelName(level) < logging.WARNING:
+            level = "WARNING"
+        fmt = (fmt or os.getenv("LOG_FORMAT", "text")).lower()
+
+        handler = logging.StreamHandler(sys.stdout)
+        if fmt == "json":
+            handler.setFormatter(JsonFormatter())
+        else:
+            handler.setFormatter(logging.Formatter(
+                "%(asctime)s %(levelname)-7s %(name)s: %(message)s", "%H:%M:%S"
+            ))
+
+        log_queue = queue.SimpleQueue()
+        root.addHandler(QueueHandler(log_queue))
+        root.setLevel(level)
+        root.propagate = False
+
+        _listener = QueueListener(log_queue, handler, respect_handler_level=False)
+        _listener.start()
+        atexit.register(_listener.stop)
+
+    return root
+
+
+def get_logger(name: str) -> logging.Logger:
+    """Logger enfant de "polymarket" (ex: get_logger("bot") -> polymarket.bot)."""
+    return logging.getLogger(f"{ROOT_LOGGER}.{name}")
@@ -0,0 +1,125 @@
+"""
+Registre de latences en mémoire (histogrammes par nom de span).
+
+Usage:
+    from metrics import span, observe
+
+    with span("place_bet.sign"):
+        signed_order = client.create_order(args)
+
+    observe("price.prices", elapsed_seconds)
+
+Chaque histogramme garde une fenêtre des derniers échantillons pour les
+percentiles (p50/p90/p99), plus des compteurs depuis le démarrage. Le coût
+d'un enregistrement est un append sous verrou: utilisable sur les chemins
+chauds.
+"""
+
+import os
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+
+class Histogram:
+    """Latences d'un span: fenêtre glissante + compteurs cumulés."""
+
+    def __init__(self, window: int = 1024):
+        """
+        Args:
+            window: Nombre d'échantillons récents gardés pour les percentiles
+        """
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float, error: bool = False):
+        with self._lock:
+            self._samples.append(seconds)
+            self.count += 1
+            self.total += seconds
+            if seconds > self.max:
+                self.max = seconds
+            if error:
+                self.errors += 1
+
+    def snapshot(self) -> Dict:
+        """Percentiles de la fenêtre et compteurs, en millisecondes."""
+        with self._lock:
+            samples = sorted(self._samples)
+            count, errors, total, max_ = self.count, self.errors, self.total, self.max
+
+        return {
+            'count': count,
+            'errors': errors,
+            'mean_ms': round(total / count * 1000, 2) if count else None,
+            'p50_ms': self._percentile(samples, 50),
+            'p90_ms': self._percentile(samples, 90),
+            'p99_ms': self._percentile(samples, 99),
+            'max_ms': round(max_ * 1000, 2) if count else None,
+        }
+
+    @staticmethod
+    def _percentile(samples: List[float], pct: float) -> Optional[float]:
+        if not samples:
+            return None
+        index = min(len(samples) - 1, int(round(pct / 100 * (len(samples) - 1))))
+        return round(samples[index] * 1000, 2)
+
+
+class MetricsRegistry:
+    """Histogrammes de latence indexés par nom de span."""
+
+    def __init__(self, window: Optional[int] = None):
+        """
+        Args:
+            window: Taille de la fenêtre des histogrammes (défaut: METRICS_WINDOW ou 1024)
+        """
+        self.window = window or int(os.getenv("METRICS_WINDOW", "1024"))
+        self._histograms: Dict[str, Histogram] = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, name: str) -> Histogram:
+        histogram = self._histograms.get(name)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(name, Histogram(self.window))
+        return histogram
+
+    def observe(self, name: str, seconds: float, error: bool = False):
+        """Enregistre une durée (en secondes) pour `name`."""
+        self.histogram(name).observe(seconds, error=error)
+
+    @contextmanager
+    def span(self, name: str):
+        """Chronomètre le bloc; une exception est comptée comme erreur puis propagée."""
+        started = time.perf_counter()
+        try:
+            yield
+        except BaseException:
+            self.observe(name, time.perf_counter() - started, error=True)
+            raise
+        self.observe(name, time.perf_counter() - started)
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """Tous les histogrammes, triés par nom."""
+        with self._lock:
+            items = sorted(self._histograms.items())
+        return {name: histogram.snapshot() for name, histogram in items}
+
+    def reset(self):
+        with self._lock:
+            self._histograms = {}
+
+
+# Registre du process (bot, web app, GUI)
+registry = MetricsRegistry()
+
+observe = registry.observe
+span = registry.span
+snapshot = registry.snapshot
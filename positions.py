@@ -0,0 +1,357 @@
+"""
+Positions reconstruites depuis l'historique des trades (fills) CLOB.
+
+Au lieu de re-télécharger tous les ordres à chaque rafraîchissement, le
+tracker ne récupère que les trades postérieurs au dernier curseur et les
+applique à un ledger par token (taille nette, prix moyen d'entrée, P&L
+réalisé). Curseur et ledger sont persistés dans un PositionStore, donc un
+redémarrage ne rejoue pas l'historique.
+
+Seuls les trades définitifs (MINED, CONFIRMED) sont appliqués. Un trade
+encore MATCHED ou RETRYING n'est pas marqué vu et retient le curseur: il est
+re-demandé à chaque sync jusqu'à ce qu'il soit confirmé ou FAILED (ignoré).
+
+Stores:
+    JsonPositionStore   Fichier JSON (POSITIONS_STATE_FILE), défaut
+    BetDatabase         Tables SQLite positions/position_sync (POSITIONS_STORE=sqlite)
+    (tout objet avec get_cursor / apply_fills / get_positions convient)
+"""
+
+import os
+import json
+import time
+import threading
+from abc import ABC, abstractmethod
+from typing import List, Dict, Optional, Iterable
+
+from py_clob_client.clob_types import TradeParams
+
+from logger import get_logger
+
+log = get_logger("positions")
+
+# Positions plus petites considérées comme fermées
+MIN_POSITION_SIZE = 0.01
+
+# Statuts CLOB d'un trade: appliqué, ignoré, ou en attente (re-demandé)
+SETTLED_STATUSES = {'MINED', 'CONFIRMED'}
+FAILED_STATUSES = {'FAILED'}
+
+
+def empty_cursor() -> Dict:
+    """Curseur initial: aucun trade vu."""
+    return {'after': 0, 'seen': {}}
+
+
+def new_entry(fill: Dict) -> Dict:
+    """Ligne de ledger vide pour le token d'un fill."""
+    return {
+        'token_id': fill['token_id'],
+        'market_id': fill.get('market_id'),
+        'outcome': fill.get('outcome') or 'Unknown',
+        'net_size': 0.0,
+        'avg_entry_price': 0.0,
+        'realized_pnl': 0.0,
+        'updated_at': 0
+    }
+
+
+def apply_fill(entry: Dict, fill: Dict) -> Dict:
+    """
+    Applique un fill à une ligne de ledger (méthode du coût moyen).
+
+    Un fill dans le sens de la position la renforce et recalcule le prix
+    moyen; un fill en sens inverse la réduit et réalise le P&L sur la part
+    fermée. Si la position se retourne, le reliquat part au prix du fill.
+    """
+    size = fill['size'] if fill['side'] == 'BUY' else -fill['size']
+    price = fill['price']
+    net_size = entry['net_size']
+    avg = entry['avg_entry_price']
+
+    if net_size == 0 or (net_size > 0) == (size > 0):
+        new_size = net_size + size
+        avg = (abs(net_size) * avg + abs(size) * price) / abs(new_size)
+    else:
+        closed = min(abs(size), abs(net_size))
+        direction = 1 if net_size > 0 else -1
+        entry['realized_pnl'] += closed * (price - avg) * direction
+        new_size = net_size + size
+        if abs(new_size) < 1e-9:
+            new_size, avg = 0.0, 0.0
+        elif (new_size > 0) != (net_size > 0):
+            avg = price
+
+    entry['net_size'] = new_size
+    entry['avg_entry_price'] = avg
+    entry['updated_at'] = max(entry.get('updated_at') or 0, fill.get('match_time') or 0)
+    if fill.get('market_id'):
+        entry['market_id'] = fill['market_id']
+    if fill.get('outcome'):
+        entry['outcome'] = fill['outcome']
+    return entry
+
+
+def portfolio_summary(positions: List[Dict], prices: Optional[Dict[str, float]] = None) -> Dict:
+    """
+    Totaux du ledger, quel que soit le store.
+
+    Args:
+        positions: Lignes du ledger (PositionStore.get_positions)
+        prices: token_id -> prix courant, pour la valeur et le P&L latent
+    """
+    open_positions = [p for p in positions if abs(p['net_size']) >= MIN_POSITION_SIZE]
+    summary = {
+        'open_positions': len(open_positions),
+        'cost_basis': sum(abs(p['net_size']) * p['avg_entry_price'] for p in open_positions),
+        'realized_pnl': sum(p['realized_pnl'] for p in positions)
+    }
+
+    if prices is not None:
+        market_value = 0.0
+        unrealized_pnl = 0.0
+        for p in open_positions:
+            price = prices.get(p['token_id'])
+            if price is None:
+                price = p['avg_entry_price']
+            market_value += abs(p['net_size']) * price
+            unrealized_pnl += p['net_size'] * (price - p['avg_entry_price'])
+        summary['market_value'] = market_value
+        summary['unrealized_pnl'] = unrealized_pnl
+
+    return summary
+
+
+def advance_cursor(cursor: Dict, trade_ids: Dict[str, int], pending: Optional[Dict[str, int]] = None) -> Dict:
+    """
+    Nouveau curseur après un lot de trades.
+
+    `after` est le match_time le plus récent, sans dépasser le plus ancien
+    trade en attente (`pending`) pour qu'il soit re-demandé; `seen` garde les
+    ids des trades traités proches de cette borne pour dédupliquer au prochain
+    appel (la requête repart une seconde avant pour ne rien rater).
+    """
+    seen = dict(cursor.get('seen') or {})
+    seen.update(trade_ids)
+    after = max([cursor.get('after') or 0] + list(seen.values()))
+    if pending:
+        after = min(after, min(pending.values()))
+    return {
+        'after': after,
+        'seen': {trade_id: ts for trade_id, ts in seen.items() if ts >= after - 1}
+    }
+
+
+class PositionStore(ABC):
+    """
+    Interface de persistance du ledger.
+
+    apply_fills doit appliquer les fills et enregistrer le curseur de façon
+    atomique: soit les deux, soit aucun. Un objet qui fournit les trois
+    méthodes sans hériter de la classe (BetDatabase) passe isinstance().
+    """
+
+    METHODS = ('get_cursor', 'apply_fills', 'get_positions')
+
+    @abstractmethod
+    def get_cursor(self) -> Dict:
+        """Curseur enregistré ({'after', 'seen'})."""
+
+    @abstractmethod
+    def apply_fills(self, fills: List[Dict], cursor: Dict):
+        """Applique les fills au ledger et enregistre le curseur."""
+
+    @abstractmethod
+    def get_positions(self) -> List[Dict]:
+        """Toutes les lignes du ledger."""
+
+    @classmethod
+    def __subclasshook__(cls, subclass):
+        if cls is PositionStore and all(callable(getattr(subclass, name, None)) for name in cls.METHODS):
+            return True
+        return NotImplemented
+
+
+class JsonPositionStore(PositionStore):
+    """Ledger et curseur dans un fichier JSON (réécrit atomiquement)."""
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        Args:
+            path: Fichier d'état (défaut: POSITIONS_STATE_FILE ou positions_state.json)
+        """
+        self.path = path or os.getenv("POSITIONS_STATE_FILE", "positions_state.json")
+        self._lock = threading.Lock()
+        self._state = self._load()
+
+    def get_cursor(self) -> Dict:
+        with self._lock:
+            return dict(self._state['cursor'])
+
+    def apply_fills(self, fills: List[Dict], cursor: Dict):
+        with self._lock:
+            positions = {token_id: dict(entry) for token_id, entry in self._state['positions'].items()}
+            for fill in fills:
+                entry = positions.get(fill['token_id']) or new_entry(fill)
+                positions[fill['token_id']] = apply_fill(entry, fill)
+
+            state = {'cursor': cursor, 'positions': positions}
+            self._write(state)
+            self._state = state
+
+    def get_positions(self) -> List[Dict]:
+        with self._lock:
+            return [dict(entry) for entry in self._state['positions'].values()]
+
+    def _load(self) -> Dict:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+            return {
+                'cursor': state.get('cursor') or empty_cursor(),
+                'positions': state.get('positions') or {}
+            }
+        except FileNotFoundError:
+            return {'cursor': empty_cursor(), 'positions': {}}
+        except (OSError, ValueError) as e:
+            log.warning("⚠️  Position state unreadable (%s), rebuilding from trades", e)
+            return {'cursor': empty_cursor(), 'positions': {}}
+
+    def _write(self, state: Dict):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.path)
+
+
+class PositionTracker:
+    """
+    Synchronise le ledger de positions avec l'API trades de la CLOB.
+
+    Chaque sync() ne demande que les trades depuis le curseur: le coût suit
+    l'activité récente, pas la taille de l'historique du compte.
+    """
+
+    def __init__(self, client, store: Optional[PositionStore] = None, owners: Optional[Iterable[str]] = None):
+        """
+        Args:
+            client: ClobClient authentifié (niveau 2)
+            store: Persistance du ledger (défaut: JsonPositionStore)
+            owners: Identifiants de l'utilisateur dans les trades (clé API,
+                adresse funder) pour reconnaître ses ordres maker
+        """
+        self.client = client
+        self.store = store or JsonPositionStore()
+        if not isinstance(self.store, PositionStore):
+            raise TypeError(f"{type(self.store).__name__} is not a PositionStore "
+                            f"(needs {', '.join(PositionStore.METHODS)})")
+        self.owners = {owner.lower() for owner in (owners or []) if owner}
+        self._lock = threading.Lock()
+        self.last_sync = None
+
+    def sync(self) -> int:
+        """
+        Récupère et applique les nouveaux trades.
+
+        Returns:
+            Nombre de fills appliqués
+        """
+        with self._lock:
+            cursor = self.store.get_cursor()
+            after = cursor.get('after') or 0
+            params = TradeParams(after=after - 1) if after else None
+
+            trades = self.client.get_trades(params)
+
+            seen = cursor.get('seen') or {}
+            fills = []
+            trade_ids = {}
+            pending = {}
+            for trade in trades:
+                trade_id = trade.get('id')
+                if not trade_id or trade_id in seen or trade_id in trade_ids:
+                    continue
+                if self.is_pending(trade):
+                    pending[trade_id] = self._match_time(trade)
+                    continue
+                trade_ids[trade_id] = self._match_time(trade)
+                fills.extend(self.fills_from_trade(trade))
+
+            fills.sort(key=lambda fill: fill['match_time'])
+            next_cursor = advance_cursor(cursor, trade_ids, pending)
+            if trade_ids or next_cursor['after'] != cursor.get('after'):
+                self.store.apply_fills(fills, next_cursor)
+            self.last_sync = time.time()
+
+            if fills:
+                log.info("📒 %d new fills applied to position ledger", len(fills))
+            return len(fills)
+
+    def open_positions(self, market_id: Optional[str] = None) -> List[Dict]:
+        """Positions non nulles du ledger, filtrées par marché si demandé."""
+        return [
+            entry for entry in self.store.get_positions()
+            if abs(entry['net_size']) >= MIN_POSITION_SIZE
+            and (not market_id or entry.get('market_id') == market_id)
+        ]
+
+    @staticmethod
+    def is_pending(trade: Dict) -> bool:
+        """True si le trade peut encore échouer (MATCHED, RETRYING...)."""
+        status = str(trade.get('status') or '').upper()
+        return bool(status) and status not in SETTLED_STATUSES | FAILED_STATUSES
+
+    def summary(self, prices: Optional[Dict[str, float]] = None) -> Dict:
+        """Totaux du portefeuille (voir portfolio_summary)."""
+        return portfolio_summary(self.store.get_positions(), prices)
+
+    def fills_from_trade(self, trade: Dict) -> List[Dict]:
+        """
+        Fills de l'utilisateur dans un trade.
+
+        En TAKER le trade lui-même est le fill. En MAKER seuls les
+        maker_orders appartenant à l'utilisateur comptent (un trade peut
+        croiser plusieurs makers). Un trade FAILED n'a pas de fill.
+        """
+        if str(trade.get('status') or '').upper() in FAILED_STATUSES:
+            return []
+
+        match_time = self._match_time(trade)
+        market_id = trade.get('market')
+
+        if str(trade.get('trader_side', 'TAKER')).upper() == 'TAKER':
+            fill = self._fill(trade.get('id'), trade.get('asset_id'), market_id, trade.get('outcome'),
+                              trade.get('side'), trade.get('size'), trade.get('price'), match_time)
+            return [fill] if fill else []
+
+        fills = []
+        for maker in trade.get('maker_orders') or []:
+            if self.owners and not ({str(maker.get('owner', '')).lower(),
+                                     str(maker.get('maker_address', '')).lower()} & self.owners):
+                continue
+            fills.append(self._fill(trade.get('id'), maker.get('asset_id'), market_id, maker.get('outcome'),
+                                    maker.get('side'), maker.get('matched_amount'), maker.get('price'),
+                                    match_time))
+        return [fill for fill in fills if fill]
+
+    @staticmethod
+    def _fill(trade_id, token_id, market_id, outcome, side, size, price, match_time) -> Optional[Dict]:
+        if not token_id:
+            return None
+        return {
+            'trade_id': trade_id,
+            'token_id': token_id,
+            'market_id': market_id,
+            'outcome': outcome,
+            'side': str(side or 'BUY').upper(),
+            'size': float(size or 0),
+            'price': float(price or 0),
+            'match_time': match_time
+        }
+
+    @staticmethod
+    def _match_time(trade: Dict) -> int:
+        try:
+            return int(float(trade.get('match_time') or 0))
+        except (TypeError, ValueError):
+            return 0
@@ -0,0 +1,73 @@
+import gc
+import sqlite3
+import threading
+
+import pytest
+
+from archive.database import BetDatabase
+
+
+def test_connections_of_finished_threads_are_closed(tmp_path):
+    db = BetDatabase(str(tmp_path / 'bets.db'))
+    opened = []
+
+    def request():
+        conn = db.conn
+        conn.execute("SELECT 1").fetchone()
+        opened.append(conn)
+
+    # Thread-per-request serving: each request thread opens its own connection
+    for _ in range(50):
+        thread = threading.Thread(target=request)
+        thread.start()
+        thread.join()
+    gc.collect()
+
+    assert len(db._connections) <= 1
+    for conn in opened:
+        with pytest.raises(sqlite3.ProgrammingError):
+            conn.execute("SELECT 1")
+    db.close()
+
+
+def test_close_closes_live_connections(tmp_path):
+    db = BetDatabase(str(tmp_path / 'bets.db'))
+    conn = db.conn
+    db.close()
+
+    assert len(db._connections) == 0
+    with pytest.raises(sqlite3.ProgrammingError):
+        conn.execute("SELECT 1")
+
+    # The instance stays usable after close()
+    assert db.conn.execute("SELECT 1").fetchone()[0] == 1
+    db.close()
+
+
+def test_bulk_writes_normalize_timestamps(tmp_path):
+    from datetime import datetime, timedelta, timezone
+
+    db = BetDatabase(str(tmp_path / 'bets.db'))
+    base = {'token_id': 'tok', 'outcome': 'Yes', 'price': 0.5, 'size': 10, 'amount_spent': 5}
+    inputs = {
+        'epoch': 1700000000,
+        'epoch-ms': 1700000000000,
+        'epoch-str': '1700000000',
+        'iso-z': '2023-11-14T22:13:20Z',
+        'iso-offset': '2023-11-15T00:13:20+02:00',
+        'aware': datetime(2023, 11, 14, 23, 13, 20, tzinfo=timezone(timedelta(hours=1))),
+        'naive': datetime(2023, 11, 14, 22, 13, 20),
+    }
+    db.insert_bets_bulk([dict(base, order_id=key, placed_at=value) for key, value in inputs.items()])
+    db.upsert_by_order_id([{'order_id': 'epoch', 'status': 'settled', 'pnl': 5.0, 'settled_at': 1700003600}])
+
+    rows = {row['order_id']: dict(row) for row in db.conn.execute("SELECT * FROM bets")}
+    assert {row['placed_at'] for row in rows.values()} == {'2023-11-14 22:13:20'}
+    assert rows['epoch']['settled_at'] == '2023-11-14 23:13:20'
+
+    # Daily stats bucket the backfilled bet on its UTC date, not a Julian day
+    assert [day['day'] for day in db.get_daily_pnl()] == ['2023-11-14']
+
+    with pytest.raises(ValueError):
+        db.insert_bets_bulk([dict(base, order_id='bad', placed_at='yesterday')])
+    db.close()
@@ -0,0 +1,53 @@
+import pytest
+
+from bot import MarketCatalog
+
+
+class Response:
+    def __init__(self, markets):
+        self.markets = markets
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.markets
+
+
+class FlakySession:
+    """Gamma stand-in: raises while `down`, else serves one market."""
+
+    def __init__(self):
+        self.down = True
+        self.calls = 0
+
+    def get(self, url, params=None, timeout=None):
+        self.calls += 1
+        if self.down:
+            raise ConnectionError("gamma down")
+        return Response([{'id': '1', 'question': 'T1 vs GEN', 'clobTokenIds': '["tok-a", "tok-b"]',
+                          'outcomePrices': '["0.6", "0.4"]'}])
+
+
+@pytest.fixture
+def catalog():
+    catalog = MarketCatalog(FlakySession(), ttl=0)
+    catalog.retry_backoff = 30
+    return catalog
+
+
+def test_failed_load_is_not_retried_during_backoff(catalog):
+    assert catalog.find_token('tok-a') is None
+    assert catalog.get_outcome_price('tok-a') is None
+    assert catalog.search('T1') == []
+    assert catalog.session.calls == 1
+
+
+def test_load_is_retried_after_backoff(catalog):
+    catalog.find_token('tok-a')
+    catalog.session.down = False
+    catalog._failed_at -= catalog.retry_backoff
+
+    assert catalog.get_outcome_price('tok-a') == pytest.approx(0.6)
+    assert catalog.session.calls == 2
+    assert catalog._failed_at == 0.0
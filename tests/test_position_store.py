@@ -0,0 +1,52 @@
+import pytest
+
+from bot import PolymarketLolBot
+from positions import JsonPositionStore, PositionTracker
+from test_positions import FakeClient, taker_trade
+
+
+@pytest.fixture
+def sqlite_tracker(tmp_path, monkeypatch):
+    monkeypatch.setenv('POSITIONS_STORE', 'sqlite')
+    monkeypatch.setenv('BETS_DB_PATH', str(tmp_path / 'bets.db'))
+
+    store = PolymarketLolBot._position_store()
+    yield PositionTracker(FakeClient(), store=store)
+    store.close()
+
+
+def test_sqlite_store_is_selected_by_env(sqlite_tracker):
+    from archive.database import BetDatabase
+
+    assert isinstance(sqlite_tracker.store, BetDatabase)
+
+
+def test_sqlite_tracker_syncs_and_summarizes(sqlite_tracker):
+    sqlite_tracker.client.trades = [
+        taker_trade('t1', 'CONFIRMED', 100, size='10', price='0.40'),
+        taker_trade('t2', 'CONFIRMED', 200, side='SELL', size='4', price='0.60'),
+    ]
+
+    assert sqlite_tracker.sync() == 2
+    [position] = sqlite_tracker.open_positions()
+    assert position['net_size'] == pytest.approx(6)
+    assert position['avg_entry_price'] == pytest.approx(0.40)
+
+    summary = sqlite_tracker.summary({'token-1': 0.50})
+    assert summary['open_positions'] == 1
+    assert summary['realized_pnl'] == pytest.approx(0.80)
+    assert summary['unrealized_pnl'] == pytest.approx(0.60)
+
+
+def test_json_and_sqlite_summaries_match(sqlite_tracker, tmp_path):
+    trades = [
+        taker_trade('t1', 'CONFIRMED', 100, size='10', price='0.40'),
+        taker_trade('t2', 'MINED', 150, side='SELL', size='15', price='0.55'),
+    ]
+    json_tracker = PositionTracker(FakeClient(), store=JsonPositionStore(str(tmp_path / 'state.json')))
+    for tracker in (sqlite_tracker, json_tracker):
+        tracker.client.trades = trades
+        tracker.sync()
+
+    prices = {'token-1': 0.30}
+    assert sqlite_tracker.summary(prices) == pytest.approx(json_tracker.summary(prices))
@@ -0,0 +1,92 @@
+import pytest
+
+from positions import JsonPositionStore, PositionStore, PositionTracker
+
+
+class FakeClient:
+    """ClobClient stub: get_trades returns the trades set by the test."""
+
+    def __init__(self):
+        self.trades = []
+
+    def get_trades(self, params=None):
+        after = getattr(params, 'after', None) or 0
+        return [trade for trade in self.trades if int(trade['match_time']) >= after]
+
+
+def taker_trade(trade_id, status, match_time, side='BUY', size='10', price='0.40'):
+    return {
+        'id': trade_id,
+        'status': status,
+        'trader_side': 'TAKER',
+        'asset_id': 'token-1',
+        'market': 'market-1',
+        'outcome': 'Yes',
+        'side': side,
+        'size': size,
+        'price': price,
+        'match_time': str(match_time),
+    }
+
+
+@pytest.fixture
+def tracker(tmp_path):
+    client = FakeClient()
+    return PositionTracker(client, store=JsonPositionStore(str(tmp_path / 'state.json')))
+
+
+def test_confirmed_trade_is_applied(tracker):
+    tracker.client.trades = [taker_trade('t1', 'CONFIRMED', 100)]
+
+    assert tracker.sync() == 1
+    [position] = tracker.open_positions()
+    assert position['net_size'] == pytest.approx(10)
+    assert position['avg_entry_price'] == pytest.approx(0.40)
+
+
+def test_matched_then_failed_trade_never_reaches_ledger(tracker):
+    trade = taker_trade('t1', 'MATCHED', 100)
+    later = taker_trade('t2', 'CONFIRMED', 200, size='5', price='0.50')
+    tracker.client.trades = [trade, later]
+
+    tracker.sync()
+    # t2 is applied, t1 is pending: the cursor must not move past it
+    assert tracker.store.get_cursor()['after'] <= 100
+    assert tracker.open_positions()[0]['net_size'] == pytest.approx(5)
+
+    trade['status'] = 'FAILED'
+    assert tracker.sync() == 0
+
+    [position] = tracker.open_positions()
+    assert position['net_size'] == pytest.approx(5)
+    assert position['avg_entry_price'] == pytest.approx(0.50)
+    assert tracker.store.get_cursor()['after'] == 200
+
+
+def test_matched_then_confirmed_trade_is_applied_once(tracker):
+    trade = taker_trade('t1', 'MATCHED', 100)
+    tracker.client.trades = [trade]
+
+    assert tracker.sync() == 0
+    assert tracker.open_positions() == []
+
+    trade['status'] = 'CONFIRMED'
+    assert tracker.sync() == 1
+    assert tracker.sync() == 0
+    assert tracker.open_positions()[0]['net_size'] == pytest.approx(10)
+
+
+def test_store_without_interface_is_rejected_at_construction():
+    class PartialStore:
+        def get_cursor(self):
+            return {'after': 0, 'seen': {}}
+
+    with pytest.raises(TypeError):
+        PositionTracker(FakeClient(), store=PartialStore())
+
+    class IncompleteSubclass(PositionStore):
+        def get_cursor(self):
+            return {'after': 0, 'seen': {}}
+
+    with pytest.raises(TypeError):
+        IncompleteSubclass()
@@ -0,0 +1,156 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+import metrics
+from async_bot import AsyncPolymarketLolBot
+from bot import PolymarketLolBot, SourceHealth
+
+# Levels in the order the CLOB /book endpoint returns them (best price last)
+BOOK = {
+    'bids': [{'price': '0.40', 'size': '5'}, {'price': '0.45', 'size': '5'}],
+    'asks': [{'price': '0.60', 'size': '5'}, {'price': '0.55', 'size': '5'}],
+}
+
+
+class Stream:
+    def get_price(self, token_id):
+        return None
+
+
+class Catalog:
+    age = 1.0
+
+    def get_outcome_price(self, token_id):
+        return None
+
+
+def make_bot(mode='sequential'):
+    """PolymarketLolBot without network/auth: only the price lookup state."""
+    bot = object.__new__(PolymarketLolBot)
+    bot.stream = Stream()
+    bot.catalog = Catalog()
+    bot.price_lookup_mode = mode
+    bot.price_hedge_delay = 0.05
+    bot.price_source_health = {name: SourceHealth(name) for name, _, _ in PolymarketLolBot.PRICE_SOURCES}
+    return bot
+
+
+def async_bot(bot, handler):
+    abot = object.__new__(AsyncPolymarketLolBot)
+    abot.bot = bot
+    abot.http = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return abot
+
+
+def test_order_book_rule_does_not_depend_on_level_order():
+    assert PolymarketLolBot._parse_order_book(BOOK) == pytest.approx(0.50)
+    reordered = {'bids': BOOK['bids'][::-1], 'asks': BOOK['asks'][::-1]}
+    assert PolymarketLolBot._parse_order_book(reordered) == pytest.approx(0.50)
+    assert PolymarketLolBot._parse_order_book({'bids': [], 'asks': BOOK['asks']}) == pytest.approx(0.55)
+
+
+@pytest.mark.parametrize('mode', ['sequential', 'hedged'])
+def test_async_lookup_uses_shared_parsing_breakers_and_metrics(mode):
+    bot = make_bot(mode)
+
+    def handler(request):
+        if request.url.path == '/book':
+            return httpx.Response(200, json=BOOK)
+        return httpx.Response(503)
+
+    metrics.registry.reset()
+    abot = async_bot(bot, handler)
+
+    async def run():
+        try:
+            # Force the order book to be tried last, after two failing sources
+            for name in ('prices', 'last_trade'):
+                bot.price_source_health[name].latency = 0.0
+            bot.price_source_health['order_book'].latency = 1.0
+            return await abot.get_token_price('tok')
+        finally:
+            await abot.aclose()
+
+    assert asyncio.run(run()) == pytest.approx(0.50)
+    assert bot.price_source_health['prices'].consecutive_failures == 1
+    assert bot.price_source_health['last_trade'].consecutive_failures == 1
+    snapshot = metrics.snapshot()
+    assert snapshot['price.order_book']['count'] == 1
+    assert snapshot['price.prices']['errors'] == 1
+    assert snapshot['price.lookup']['count'] == 1
+
+
+def test_async_lookup_skips_open_breaker():
+    bot = make_bot()
+    calls = []
+
+    def handler(request):
+        calls.append(request.url.path)
+        return httpx.Response(200, json=BOOK)
+
+    for name in ('prices', 'last_trade'):
+        bot.price_source_health[name].state = 'open'
+        bot.price_source_health[name].opened_at = float('inf')
+    abot = async_bot(bot, handler)
+
+    async def run():
+        try:
+            return await abot.get_token_price('tok')
+        finally:
+            await abot.aclose()
+
+    assert asyncio.run(run()) == pytest.approx(0.50)
+    assert calls == ['/book']
+
+
+def test_empty_answers_do_not_open_the_breaker():
+    bot = make_bot()
+    health = bot.price_source_health['order_book']
+
+    for _ in range(5):
+        bot.record_price_source('order_book', 0.01, None)
+    assert health.state == 'closed'
+    assert health.success_rate < 1.0
+
+    for _ in range(health.failure_threshold):
+        bot.record_price_source('order_book', 0.01, None, error=True)
+    assert health.state == 'open'
+
+
+def test_batch_fallback_stops_at_the_deadline():
+    from concurrent.futures import ThreadPoolExecutor
+
+    class DownSession:
+        def post(self, *args, **kwargs):
+            raise ConnectionError("prices down")
+
+    bot = make_bot()
+    bot.session = DownSession()
+    bot.price_batch_deadline = 0.2
+    bot._price_executor = ThreadPoolExecutor(max_workers=2)
+    bot._batch_executor = ThreadPoolExecutor(max_workers=2)
+    calls = []
+
+    def slow_source(token_id):
+        calls.append(token_id)
+        time.sleep(0.3)
+        return None
+
+    bot._price_from_prices_endpoint = slow_source
+    bot._price_from_last_trade = slow_source
+    bot._price_from_order_book = slow_source
+
+    tokens = [f"tok-{i}" for i in range(20)]
+    started = time.perf_counter()
+    prices = bot.get_token_prices(tokens)
+    assert time.perf_counter() - started < 0.5
+    assert prices == dict.fromkeys(tokens)
+
+    # Queued lookups were cancelled and running ones did not start another source
+    bot._batch_executor.shutdown(wait=True)
+    assert len(calls) == 2
+    # Single lookups keep their own, idle pool
+    assert bot._price_executor.submit(lambda: 'free').result(timeout=0.1) == 'free'
@@ -0,0 +1,152 @@
+import json
+import queue
+import threading
+
+import pytest
+
+from bot import PriceStream
+
+
+def book(token_id, bids, asks):
+    return {
+        'event_type': 'book',
+        'asset_id': token_id,
+        'bids': [{'price': str(p), 'size': str(s)} for p, s in bids],
+        'asks': [{'price': str(p), 'size': str(s)} for p, s in asks],
+    }
+
+
+@pytest.fixture
+def stream():
+    """PriceStream fed through _on_message, as if connected."""
+    stream = PriceStream(url="ws://127.0.0.1:1")
+    stream._token_ids.update({'tok-a', 'tok-b'})
+    stream._connected.set()
+    return stream
+
+
+def feed(stream, *events):
+    stream._on_message(None, json.dumps(list(events)))
+
+
+def test_book_snapshot_sets_top_of_book(stream):
+    feed(stream, book('tok-a', [(0.40, 10), (0.45, 5)], [(0.55, 3), (0.60, 8)]))
+
+    quote = stream.get_quote('tok-a')
+    assert quote['best_bid'] == pytest.approx(0.45)
+    assert quote['best_ask'] == pytest.approx(0.55)
+    assert quote['price'] == pytest.approx(0.50)
+
+
+def test_book_for_unsubscribed_token_is_ignored(stream):
+    feed(stream, book('tok-z', [(0.40, 10)], [(0.60, 10)]))
+    assert stream.get_quote('tok-z') is None
+
+
+def test_price_change_updates_and_removes_levels(stream):
+    feed(stream, book('tok-a', [(0.40, 10)], [(0.60, 10)]))
+
+    feed(stream, {'event_type': 'price_change', 'price_changes': [
+        {'asset_id': 'tok-a', 'side': 'BUY', 'price': '0.48', 'size': '4'},
+    ]})
+    assert stream.get_quote('tok-a')['best_bid'] == pytest.approx(0.48)
+
+    # Size 0 removes the level; legacy format with a top-level asset_id
+    feed(stream, {'event_type': 'price_change', 'asset_id': 'tok-a', 'changes': [
+        {'side': 'BUY', 'price': '0.48', 'size': '0'},
+        {'side': 'SELL', 'price': '0.60', 'size': '0'},
+    ]})
+    quote = stream.get_quote('tok-a')
+    assert quote['best_bid'] == pytest.approx(0.40)
+    assert quote['best_ask'] is None
+    assert quote['price'] == pytest.approx(0.40)
+
+
+def test_last_trade_is_kept_across_book_updates(stream):
+    feed(stream, book('tok-a', [(0.40, 10)], [(0.60, 10)]))
+    feed(stream, {'event_type': 'last_trade_price', 'asset_id': 'tok-a', 'price': '0.52'})
+    assert stream.get_quote('tok-a')['last_trade'] == pytest.approx(0.52)
+
+    feed(stream, {'event_type': 'price_change', 'price_changes': [
+        {'asset_id': 'tok-a', 'side': 'SELL', 'price': '0.58', 'size': '1'},
+    ]})
+    assert stream.get_quote('tok-a')['last_trade'] == pytest.approx(0.52)
+
+
+def test_listeners_get_one_callback_per_updated_token(stream):
+    calls = []
+    stream.add_listener(lambda token_id, quote: calls.append((token_id, quote['price'])))
+    stream.add_listener(lambda token_id, quote: 1 / 0)  # a failing listener must not stop the others
+
+    feed(stream,
+         book('tok-a', [(0.40, 10)], [(0.60, 10)]),
+         book('tok-b', [(0.20, 10)], [(0.30, 10)]),
+         {'event_type': 'price_change', 'price_changes': [
+             {'asset_id': 'tok-a', 'side': 'BUY', 'price': '0.44', 'size': '1'},
+         ]})
+
+    assert calls == [('tok-a', pytest.approx(0.52)), ('tok-b', pytest.approx(0.25))]
+
+
+def test_non_json_messages_are_ignored(stream):
+    stream._on_message(None, "PONG")
+    assert stream.get_quote('tok-a') is None
+
+
+class MarketServer:
+    """Local stand-in for the CLOB market WebSocket."""
+
+    def __init__(self, websockets_sync):
+        self.subscriptions = queue.Queue()
+        self.connections = queue.Queue()
+        self.server = websockets_sync.serve(self._handler, "127.0.0.1", 0, close_timeout=0.5)
+        self.url = f"ws://127.0.0.1:{self.server.socket.getsockname()[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def _handler(self, ws):
+        self.connections.put(ws)
+        for message in ws:
+            if message == "PING":
+                ws.send("PONG")
+                continue
+            payload = json.loads(message)
+            self.subscriptions.put(payload)
+            for token_id in payload.get('assets_ids', []):
+                ws.send(json.dumps([book(token_id, [(0.40, 10)], [(0.60, 10)])]))
+
+    def close(self):
+        self.server.shutdown()
+
+
+@pytest.fixture
+def server():
+    server = MarketServer(pytest.importorskip("websockets.sync.server"))
+    yield server
+    server.close()
+
+
+def test_stream_against_local_server(server):
+    pytest.importorskip("websocket")
+    stream = PriceStream(url=server.url)
+    updates = queue.Queue()
+    stream.add_listener(lambda token_id, quote: updates.put((token_id, quote['price'])))
+
+    stream.subscribe(['tok-a'])
+    try:
+        assert stream.wait_for_price('tok-a', timeout=5) == pytest.approx(0.50)
+        assert server.subscriptions.get(timeout=5) == {'assets_ids': ['tok-a'], 'type': 'market'}
+        assert updates.get(timeout=5) == ('tok-a', pytest.approx(0.50))
+
+        # Token added on an open connection: incremental subscribe message
+        stream.subscribe(['tok-b'])
+        assert server.subscriptions.get(timeout=5) == {'assets_ids': ['tok-b'], 'operation': 'subscribe'}
+        assert stream.wait_for_price('tok-b', timeout=5) == pytest.approx(0.50)
+
+        # Server drops the connection: quotes are unavailable, then rebuilt on reconnect
+        server.connections.get(timeout=5).close()
+        server.connections.get(timeout=10)
+        subscription = server.subscriptions.get(timeout=5)
+        assert sorted(subscription['assets_ids']) == ['tok-a', 'tok-b']
+        assert stream.wait_for_price('tok-a', timeout=5) == pytest.approx(0.50)
+    finally:
+        stream.stop()
@@ -0,0 +1,49 @@
+import socket
+import threading
+import time
+
+import pytest
+import requests
+
+from transport import HttpTransport
+
+
+@pytest.fixture
+def stalling_server():
+    """Accepts connections and never answers; counts them."""
+    server = socket.socket()
+    server.bind(('127.0.0.1', 0))
+    server.listen(16)
+    accepted = []
+    stop = threading.Event()
+
+    def serve():
+        server.settimeout(0.1)
+        while not stop.is_set():
+            try:
+                conn, _ = server.accept()
+                accepted.append(conn)
+            except socket.timeout:
+                continue
+
+    thread = threading.Thread(target=serve, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.getsockname()[1]}/", accepted
+    stop.set()
+    thread.join()
+    for conn in accepted:
+        conn.close()
+    server.close()
+
+
+def test_read_timeout_is_not_retried(stalling_server):
+    url, accepted = stalling_server
+    transport = HttpTransport(proxies={}, retries=2, backoff=0)
+
+    started = time.perf_counter()
+    with pytest.raises(requests.exceptions.ReadTimeout):
+        transport.get(url, timeout=0.3)
+    elapsed = time.perf_counter() - started
+
+    assert elapsed < 0.9
+    assert len(accepted) == 1
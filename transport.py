@@ -0,0 +1,199 @@
+"""
+Couche HTTP partagée pour tous les appels Polymarket.
+
+Un seul pool de connexions keep-alive par process, configuré depuis .env:
+bot, web app, GUI et client py-clob-client passent tous par ici, donc les
+handshakes TLS ne sont payés qu'une fois par connexion.
+
+Variables d'environnement:
+    PROXY_HTTP / PROXY_HTTPS   Proxy pour tous les appels
+    HTTP_POOL_CONNECTIONS      Nombre de hosts gardés en pool (défaut 8)
+    HTTP_POOL_SIZE             Connexions gardées ouvertes par host (défaut 32)
+    HTTP_RETRIES               Retries sur 429 / 5xx (défaut 2); au plus 1 sur échec
+                               de connexion, jamais sur timeout de lecture
+    HTTP_BACKOFF               Facteur de backoff exponentiel en s (défaut 0.3)
+    HTTP_TIMEOUT               Timeout par défaut en s (défaut 10)
+"""
+
+import os
+import threading
+from typing import Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from dotenv import load_dotenv
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+try:
+    import h2  # noqa: F401  (HTTP/2 pour httpx, optionnel)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+load_dotenv()
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+def get_proxies() -> Optional[Dict]:
+    """Proxies configurés (format requests) ou None."""
+    proxy_http = os.getenv("PROXY_HTTP", "").strip()
+    proxy_https = os.getenv("PROXY_HTTPS", "").strip()
+
+    if not (proxy_http or proxy_https):
+        return None
+
+    proxies = {}
+    if proxy_http:
+        proxies['http'] = proxy_http
+    if proxy_https:
+        proxies['https'] = proxy_https
+    return proxies
+
+
+class HttpTransport:
+    """
+    Façade requests.Session sûre entre threads.
+
+    Chaque thread a sa propre Session (cookies, état), mais toutes partagent
+    le même HTTPAdapter, donc le même pool de connexions keep-alive et la
+    même politique de retry.
+    """
+
+    def __init__(self, proxies: Optional[Dict] = None, pool_connections: Optional[int] = None,
+                 pool_maxsize: Optional[int] = None, retries: Optional[int] = None,
+                 backoff: Optional[float] = None, timeout: Optional[float] = None):
+        """
+        Args:
+            proxies: Proxies au format requests (défaut: PROXY_HTTP/PROXY_HTTPS)
+            pool_connections: Nombre de hosts gardés en pool
+            pool_maxsize: Connexions gardées ouvertes par host
+            retries: Retries sur 429 et 5xx (GET/HEAD seulement). Un échec de
+                connexion est retenté au plus une fois; un timeout de lecture
+                jamais, sinon un timeout=10 pourrait bloquer 30s et plus
+            backoff: Facteur de backoff exponentiel entre retries
+            timeout: Timeout appliqué quand l'appelant n'en donne pas
+        """
+        self.proxies = proxies if proxies is not None else get_proxies()
+        self.pool_connections = pool_connections or int(os.getenv("HTTP_POOL_CONNECTIONS", "8"))
+        self.pool_maxsize = pool_maxsize or int(os.getenv("HTTP_POOL_SIZE", "32"))
+        self.timeout = timeout if timeout is not None else float(os.getenv("HTTP_TIMEOUT", "10"))
+
+        retries = retries if retries is not None else int(os.getenv("HTTP_RETRIES", "2"))
+        retry = Retry(
+            total=retries,
+            connect=min(retries, 1),
+            read=False,  # timeout de lecture: erreur d'origine, sans retry
+            status=retries,
+            backoff_factor=backoff if backoff is not None else float(os.getenv("HTTP_BACKOFF", "0.3")),
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=frozenset(["GET", "HEAD"]),
+            raise_on_status=False
+        )
+        self.adapter = HTTPAdapter(
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize,
+            max_retries=retry
+        )
+        self._local = threading.local()
+
+    @property
+    def current(self) -> requests.Session:
+        """Session du thread courant (créée au premier appel)."""
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            session.mount("https://", self.adapter)
+            session.mount("http://", self.adapter)
+            if self.proxies:
+                session.proxies.update(self.proxies)
+            self._local.session = session
+        return session
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        kwargs.setdefault("timeout", self.timeout)
+        return self.current.request(method, url, **kwargs)
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    def head(self, url: str, **kwargs) -> requests.Response:
+        return self.request("HEAD", url, **kwargs)
+
+
+_transport = None
+_transport_lock = threading.Lock()
+
+
+def get_transport() -> HttpTransport:
+    """Transport partagé du process (créé au premier appel)."""
+    global _transport
+    if _transport is None:
+        with _transport_lock:
+            if _transport is None:
+                _transport = HttpTransport()
+    return _transport
+
+
+def create_async_client(max_connections: Optional[int] = None, **kwargs) -> "httpx.AsyncClient":
+    """httpx.AsyncClient avec la même config (proxy, pool, timeout), HTTP/2 si h2 est installé."""
+    if httpx is None:
+        raise RuntimeError("httpx is required for the async client")
+
+    transport = get_transport()
+    proxies = transport.proxies or {}
+    max_connections = max_connections or transport.pool_maxsize
+
+    return httpx.AsyncClient(
+        proxy=proxies.get('https') or proxies.get('http'),
+        limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections
+        ),
+        timeout=httpx.Timeout(transport.timeout),
+        http2=HTTP2_AVAILABLE,
+        **kwargs
+    )
+
+
+def install_clob_http_client():
+    """
+    Remplace le client HTTP global de py-clob-client par un client configuré.
+
+    Le SDK crée son httpx.Client à l'import, avant que les proxies du .env ne
+    soient posés dans l'environnement; on le recrée ici avec le proxy, la
+    taille de pool et le timeout du transport partagé.
+    """
+    if httpx is None:
+        return
+
+    try:
+        from py_clob_client.http_helpers import helpers
+    except ImportError:
+        return
+
+    if not hasattr(helpers, '_http_client'):
+        return
+
+    transport = get_transport()
+    proxies = transport.proxies or {}
+    old_client = helpers._http_client
+
+    helpers._http_client = httpx.Client(
+        proxy=proxies.get('https') or proxies.get('http'),
+        limits=httpx.Limits(
+            max_connections=transport.pool_maxsize,
+            max_keepalive_connections=transport.pool_maxsize
+        ),
+        timeout=httpx.Timeout(transport.timeout),
+        http2=HTTP2_AVAILABLE
+    )
+    old_client.close()
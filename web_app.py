@@ -3,16 +3,23 @@
 Flask backend with neon UI
 """
 
-from flask import Flask, render_template, jsonify, request, session, redirect, url_for
+from flask import Flask, render_template, jsonify, request, session, redirect, url_for, Response, stream_with_context
 from flask_cors import CORS
 from functools import wraps
 import os
-from bot import PolymarketLolBot
+import json
+import math
+import queue
+from bot import PolymarketLolBot, apply_price_buffers
+from transport import get_transport
+import metrics
+from logger import get_logger, setup_logging
 from dotenv import load_dotenv
 import threading
 import time
 
 load_dotenv()
+log = get_logger("web")
 
 app = Flask(__name__)
 CORS(app)
@@ -29,12 +36,227 @@ bot = None
 bot_lock = threading.Lock()
 
 def get_bot():
-    """Get or create bot instance (thread-safe)"""
+    """Get or create bot instance (lock only taken until it exists)"""
     global bot
-    with bot_lock:
-        if bot is None:
-            bot = PolymarketLolBot()
-        return bot
+    if bot is None:
+        with bot_lock:
+            if bot is None:
+                bot = PolymarketLolBot()
+    return bot
+
+def parse_amount(value):
+    """USDC amount from a request: finite and positive, ValueError otherwise"""
+    try:
+        amount = float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f'Invalid amount: {value!r}')
+    if not math.isfinite(amount) or amount <= 0:
+        raise ValueError(f'Invalid amount: {value!r}')
+    return amount
+
+class PriceCache:
+    """
+    Short-TTL server-side price cache with request coalescing.
+
+    Concurrent misses for the same token share one upstream call
+    (single-flight): the first request fetches, the others wait for its
+    result. N browser tabs polling the same tokens cost one upstream lookup
+    per TTL.
+    """
+
+    TTL = float(os.getenv('PRICE_CACHE_TTL', '1.0'))
+    WAIT_TIMEOUT = 30
+
+    def __init__(self, ttl=None):
+        self.ttl = ttl if ttl is not None else self.TTL
+        self.lock = threading.Lock()
+        self.entries = {}    # token_id -> (price, source, fetched_at)
+        self.inflight = {}   # token_id -> threading.Event set when the fetch ends
+
+    def get(self, token_id):
+        """Return (price, source, age_seconds) for one token."""
+        return self.get_many([token_id])[token_id]
+
+    def get_many(self, token_ids):
+        """
+        Return {token_id: (price, source, age_seconds)}.
+
+        Missing tokens this request is first to ask for are fetched in one
+        bulk call; tokens another request is already fetching are awaited.
+        """
+        token_ids = list(dict.fromkeys(token_ids))
+        results = {}
+        to_fetch = []
+        to_wait = []
+
+        with self.lock:
+            now = time.time()
+            for token_id in token_ids:
+                entry = self.entries.get(token_id)
+                if entry and now - entry[2] < self.ttl:
+                    results[token_id] = entry
+                elif token_id in self.inflight:
+                    to_wait.append((token_id, self.inflight[token_id]))
+                else:
+                    self.inflight[token_id] = threading.Event()
+                    to_fetch.append(token_id)
+
+        if to_fetch:
+            try:
+                fetched = self._fetch(to_fetch)
+                with self.lock:
+                    for token_id, (price, source) in fetched.items():
+                        self.entries[token_id] = (price, source, time.time())
+            finally:
+                with self.lock:
+                    events = [self.inflight.pop(token_id) for token_id in to_fetch]
+                for event in events:
+                    event.set()
+
+        for token_id, event in to_wait:
+            event.wait(self.WAIT_TIMEOUT)
+
+        with self.lock:
+            now = time.time()
+            for token_id in token_ids:
+                if token_id not in results:
+                    # Missing entry: the shared fetch failed
+                    results[token_id] = self.entries.get(token_id, (None, None, now))
+                price, source, fetched_at = results[token_id]
+                results[token_id] = (price, source, now - fetched_at)
+
+        return results
+
+    def _fetch(self, token_ids):
+        """One upstream call for the whole batch: {token_id: (price, source)}."""
+        bot = get_bot()
+        if len(token_ids) == 1:
+            price, source = bot.get_token_price_with_source(token_ids[0])
+            return {token_ids[0]: (price, source)}
+        return {t: (price, None) for t, price in bot.get_token_prices(token_ids).items()}
+
+
+price_cache = PriceCache()
+
+class PriceFeed:
+    """
+    Shared server-side price feed for the SSE endpoint.
+
+    Each token is followed once (WebSocket stream + bulk polling fallback),
+    whatever the number of connected browsers, and every update is fanned out
+    to the queues of the clients watching that token.
+    """
+
+    POLL_INTERVAL = float(os.getenv('PRICE_FEED_POLL_INTERVAL', '3'))
+    # Each open stream holds a server thread: keep the rest for API requests
+    MAX_STREAMS = int(os.getenv('PRICE_FEED_MAX_STREAMS', '16'))
+    CLIENT_QUEUE_SIZE = 100
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.clients = {}        # client queue -> set of token_ids
+        self.watchers = {}       # token_id -> number of clients
+        self.last_prices = {}    # token_id -> (price, timestamp)
+        self.thread = None
+        self.listening = False
+
+    def connect(self, token_ids):
+        """
+        Register a client and return its queue of price updates.
+
+        Returns None when MAX_STREAMS clients are already connected.
+        """
+        token_ids = list(dict.fromkeys(token_ids))
+        client = queue.Queue(maxsize=self.CLIENT_QUEUE_SIZE)
+        bot = get_bot()
+
+        with self.lock:
+            if len(self.clients) >= self.MAX_STREAMS:
+                return None
+            self.clients[client] = set(token_ids)
+            new_tokens = [t for t in token_ids if t not in self.watchers]
+            for token_id in token_ids:
+                self.watchers[token_id] = self.watchers.get(token_id, 0) + 1
+
+            if not self.listening:
+                self.listening = bot.stream_prices([], callback=self._on_stream_update)
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._poll_loop, daemon=True)
+                self.thread.start()
+
+        if new_tokens:
+            bot.stream_prices(new_tokens)
+        return client
+
+    def disconnect(self, client):
+        """Unregister a client; tokens nobody watches anymore are dropped."""
+        with self.lock:
+            token_ids = self.clients.pop(client, set())
+            dropped = []
+            for token_id in token_ids:
+                self.watchers[token_id] -= 1
+                if self.watchers[token_id] <= 0:
+                    del self.watchers[token_id]
+                    self.last_prices.pop(token_id, None)
+                    dropped.append(token_id)
+
+        if dropped:
+            get_bot().stream.unsubscribe(dropped)
+
+    def snapshot(self, token_ids):
+        """Last known prices for a new client."""
+        with self.lock:
+            return {t: self.last_prices[t][0] for t in token_ids if t in self.last_prices}
+
+    def publish(self, token_id, price):
+        """Fan out a price update to every client watching the token."""
+        if price is None:
+            return
+
+        with self.lock:
+            previous = self.last_prices.get(token_id)
+            self.last_prices[token_id] = (price, time.time())
+            if previous and previous[0] == price:
+                return
+            targets = [c for c, tokens in self.clients.items() if token_id in tokens]
+
+        update = {'token_id': token_id, 'price': price}
+        for client in targets:
+            try:
+                client.put_nowait(update)
+            except queue.Full:
+                pass  # Slow client: it will get the next update
+
+    def _on_stream_update(self, token_id, quote):
+        with self.lock:
+            watched = token_id in self.watchers
+        if watched:
+            self.publish(token_id, quote.get('price'))
+
+    def _poll_loop(self):
+        """Poll tokens the WebSocket did not update recently, in one bulk call."""
+        while True:
+            time.sleep(self.POLL_INTERVAL)
+            now = time.time()
+            with self.lock:
+                stale = [
+                    t for t in self.watchers
+                    if now - self.last_prices.get(t, (None, 0))[1] >= self.POLL_INTERVAL
+                ]
+            if not stale:
+                continue
+
+            try:
+                prices = price_cache.get_many(stale)
+            except Exception as e:
+                log.warning("⚠️  Price feed poll failed: %s", e)
+                continue
+
+            for token_id, (price, _, _) in prices.items():
+                self.publish(token_id, price)
+
+
+price_feed = PriceFeed()
 
 def login_required(f):
     """Decorator to require login for routes"""
@@ -126,12 +348,13 @@ def get_markets():
 def get_price(token_id):
     """Get token price"""
     try:
-        bot = get_bot()
-        price = bot.get_token_price(token_id)
+        price, source, age = price_cache.get(token_id)
 
         return jsonify({
             'success': True,
-            'price': price
+            'price': price,
+            'source': source,
+            'age': round(age, 3)
         })
     except Exception as e:
         return jsonify({
@@ -139,6 +362,71 @@ def get_price(token_id):
             'error': str(e)
         }), 500
 
+@app.route('/api/prices', methods=['GET'])
+@login_required
+def get_prices():
+    """Get several token prices in one call (?token_ids=a,b,c)"""
+    try:
+        token_ids = [t.strip() for t in request.args.get('token_ids', '').split(',') if t.strip()]
+
+        if not token_ids:
+            return jsonify({
+                'success': False,
+                'error': 'token_ids is required'
+            }), 400
+
+        cached = price_cache.get_many(token_ids)
+
+        return jsonify({
+            'success': True,
+            'prices': {t: price for t, (price, _, _) in cached.items()},
+            'ages': {t: round(age, 3) for t, (_, _, age) in cached.items()}
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/api/stream/prices', methods=['GET'])
+@login_required
+def stream_prices():
+    """Server-Sent Events price feed (?token_ids=a,b)"""
+    token_ids = [t.strip() for t in request.args.get('token_ids', '').split(',') if t.strip()]
+
+    if not token_ids:
+        return jsonify({
+            'success': False,
+            'error': 'token_ids is required'
+        }), 400
+
+    client = price_feed.connect(token_ids)
+    if client is None:
+        return jsonify({
+            'success': False,
+            'error': 'Too many open price streams'
+        }), 503
+
+    def generate():
+        try:
+            for token_id, price in price_feed.snapshot(token_ids).items():
+                yield f"data: {json.dumps({'token_id': token_id, 'price': price})}\n\n"
+
+            while True:
+                try:
+                    update = client.get(timeout=15)
+                    yield f"data: {json.dumps(update)}\n\n"
+                except queue.Empty:
+                    # Comment line keeps proxies from closing an idle stream
+                    yield ": keep-alive\n\n"
+        finally:
+            price_feed.disconnect(client)
+
+    return Response(stream_with_context(generate()), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'  # Disable nginx response buffering
+    })
+
 @app.route('/api/bet', methods=['POST'])
 @login_required
 def place_bet():
@@ -153,30 +441,34 @@ def place_bet():
 
         # Price buffer (1% on amount, configurable% on price)
         price_buffer_pct = float(data.get('price_buffer', 0.5))
-        amount_multiplier = 1.01  # Fixed 1% on amount
-
-        safe_amount = amount * amount_multiplier
-
-        # Apply price buffer
-        remaining_to_max = 0.99 - price
-        price_buffer = min(price * (price_buffer_pct / 100), remaining_to_max)
-        adjusted_price = min(0.99, price + price_buffer)
 
         bot = get_bot()
-        result = bot.place_bet(
-            token_id=token_id,
-            side=side,
-            price=adjusted_price,
-            total_amount=safe_amount,
-            confirm=False
-        )
+        if side.upper() == 'BUY':
+            # Posts a pre-signed order when one is ready at this price
+            result = bot.place_bet_fast(
+                token_id=token_id,
+                price=price,
+                amount=amount,
+                price_buffer_pct=price_buffer_pct
+            )
+        else:
+            adjusted_price, safe_amount = apply_price_buffers(price, amount, price_buffer_pct)
+            result = bot.place_bet(
+                token_id=token_id,
+                side=side,
+                price=adjusted_price,
+                total_amount=safe_amount,
+                confirm=False
+            )
+            if result:
+                result = dict(result, price=adjusted_price, amount=safe_amount)
 
         if result and result.get('success'):
             return jsonify({
                 'success': True,
                 'order_id': result.get('orderID', 'N/A'),
-                'amount': safe_amount,
-                'price': adjusted_price
+                'amount': result.get('amount'),
+                'price': result.get('price')
             })
         else:
             error_msg = result.get('error', 'Unknown error') if result else 'Bet placement failed'
@@ -191,13 +483,88 @@ def place_bet():
             'error': str(e)
         }), 500
 
+@app.route('/api/presign', methods=['POST'])
+@login_required
+def presign():
+    """Keep signed BUY orders ready for the selected market"""
+    try:
+        data = request.json
+
+        token_ids = data.get('token_ids', [])
+        try:
+            amounts = [parse_amount(a) for a in data.get('amounts', [])]
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'error': str(e)
+            }), 400
+        price_buffer_pct = float(data.get('price_buffer', 0.5))
+
+        bot = get_bot()
+        bot.presigner.watch(token_ids, amounts=amounts, price_buffer_pct=price_buffer_pct)
+
+        return jsonify({
+            'success': True,
+            'enabled': bot.presigner.enabled
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/api/warmup', methods=['POST'])
+@login_required
+def warmup():
+    """Warm CLOB/Gamma connections before a bet (called on market select)"""
+    try:
+        bot = get_bot()
+        bot.warmer.ping()
+
+        return jsonify({
+            'success': True,
+            'enabled': bot.warmer.enabled,
+            'connections': bot.warmer.snapshot()
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/api/positions', methods=['GET'])
+@login_required
+def get_positions():
+    """Open positions from the trades ledger, valued at current prices (?market_id=)"""
+    try:
+        portfolio = get_bot().get_portfolio(request.args.get('market_id') or None)
+
+        return jsonify({
+            'success': True,
+            'positions': portfolio['positions'],
+            'summary': portfolio['summary']
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/api/metrics')
+@login_required
+def get_metrics():
+    """Latency histograms (p50/p90/p99 per span: place_bet.*, price.*, search, warmup)"""
+    return jsonify({
+        'success': True,
+        'metrics': metrics.snapshot()
+    })
+
 @app.route('/api/load-url', methods=['POST'])
 @login_required
 def load_url():
     """Load market from Polymarket URL"""
     try:
         import re
-        import requests
 
         data = request.json
         url = data.get('url', '').strip()
@@ -221,7 +588,7 @@ def load_url():
 
         # Query Gamma API
         api_url = f"https://gamma-api.polymarket.com/events?slug={slug}"
-        resp = requests.get(api_url, timeout=15)
+        resp = get_transport().get(api_url, timeout=15)
 
         if resp.status_code != 200:
             return jsonify({
@@ -290,9 +657,21 @@ def health():
         'proxy': os.getenv('PROXY_HTTP', 'none')
     })
 
+@app.route('/api/health/details', methods=['GET'])
+@login_required
+def health_details():
+    """Price source circuit breakers and warm connection pool"""
+    return jsonify({
+        'success': True,
+        'price_sources': bot.get_price_source_health() if bot else [],
+        'connections': bot.warmer.snapshot() if bot else {}
+    })
+
 if __name__ == '__main__':
-    print("🌐 Starting Polymarket Web App...")
+    # Development server. In production run: gunicorn -c gunicorn.conf.py web_app:app
+    setup_logging()
+    print("🌐 Starting Polymarket Web App (dev server)...")
     print("🇦🇹 Running from VPS (no geo restrictions)")
     print("⚡ Access at: http://0.0.0.0:8080")
 
-    app.run(host='0.0.0.0', port=8080, debug=False)
+    app.run(host='0.0.0.0', port=8080, debug=False, threaded=True)